@@ -7,3 +7,7 @@ __version__ = '1.0.1'
 ASTIFF_BLOCK_SIZE = 4
 BASE_CACHE_DIR = os.path.expanduser('~/.cache/fsm_eigenvalue')
 DEFAULT_PAGINATE_BY = 50
+DEFAULT_COMPLIB = 'zlib'
+DEFAULT_COMPLEVEL = 1
+DEFAULT_BACKEND = 'python'
+DEFAULT_STORE_BACKEND = 'hdf5'
@@ -1,2 +1,2 @@
 from .core import perform_iteration
-from .parameter_sweep import parameter_sweep
+from .parameter_sweep import parameter_sweep, ResultsBlock, SweepEngine
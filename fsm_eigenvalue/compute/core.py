@@ -1,7 +1,8 @@
 import physical_dualism as pd
 import numpy as np
 
-from .matrices import compute_global_matrices
+from ..load import get_swept_materials
+from .matrices import combine_stiffness_components, compute_global_matrices, compute_global_matrix_components
 from .utils import clip_small_eigenvalues, get_relative_error
 
 
@@ -26,11 +27,27 @@ def solve_eigenvalue_problem(inv_G, A, normalize_eigenvalues=None):
 
     return eigenvalue_min, mode_shape_min
 
-def perform_iteration(integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m):
-    K_hat, K_sigma, M = compute_global_matrices(
+def perform_iteration(integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m, compute_matrices=compute_global_matrices):
+    K_hat, K_sigma, M = compute_matrices(
         integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m
     )
 
+    return solve_iteration(K_hat, K_sigma, M, materials, a, t_b, m)
+
+def perform_material_sweep_iteration(integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m, material_axes, material_points):
+    # Assemble the global matrices only once per ``(a, t_b, m)``, and cheaply
+    # recombine the stiffness matrix components for every material point
+    swept_material_ids = set(material_id for _, material_id, _ in material_axes)
+    K_hat_components, K_sigma, M = compute_global_matrix_components(
+        integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m, swept_material_ids
+    )
+
+    for material_values in material_points:
+        swept_materials = get_swept_materials(materials, material_axes, material_values)
+        K_hat = combine_stiffness_components(K_hat_components, swept_materials)
+        yield material_values, solve_iteration(K_hat, K_sigma, M, swept_materials, a, t_b, m)
+
+def solve_iteration(K_hat, K_sigma, M, materials, a, t_b, m):
     # As per eq. 6.40,6.41 from [Milasinovic1997]
     # ``G`` is the lower triangle matrix factorized from ``K_hat = G * G.T``
     inv_G = np.linalg.cholesky(K_hat).I
@@ -68,3 +85,7 @@ def perform_iteration(integral_db, beam_type, strip_data, materials, astiff_shap
 def get_modal_composite(modal_raw_results):
     best_result = min(modal_raw_results, key=lambda x: x[6]) # modal composite via sigma_cr
     return best_result[:-3] # Exclude the `Phi_*` matrices, as we don't need them in modal composites
+
+def add_material_values(result, material_values):
+    # Material property columns follow ``a, t_b``, see ``store.with_material_axes``
+    return result[:2] + tuple(material_values) + result[2:]
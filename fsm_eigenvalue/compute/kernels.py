@@ -0,0 +1,263 @@
+import logging
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError: # Numba is an optional dependency
+    njit = None
+
+from .. import ASTIFF_BLOCK_SIZE
+from .matrices import assemble_global_matrices, compute_global_matrices, get_mode_integrals
+
+
+logger = logging.getLogger(__name__)
+
+
+BACKEND_CHOICES = ['python', 'numba']
+BACKEND_PARITY_RTOL = 10**-9
+
+
+def _fill_local_matrix(X, X_uu, X_ww):
+    # Same layout as ``utils.assemble_local_matrix``, written into a preallocated buffer
+    X_uu11, X_uu12, X_uu13, X_uu14, X_uu22, X_uu23, X_uu24, X_uu33, X_uu34, X_uu44 = X_uu
+    X_ww11, X_ww12, X_ww13, X_ww14, X_ww22, X_ww23, X_ww24, X_ww33, X_ww34, X_ww44 = X_ww
+
+    X[:, :] = 0.
+    X[0, 0] = X_uu11
+    X[0, 1] = X_uu13
+    X[0, 4] = X_uu12
+    X[0, 5] = X_uu14
+    X[1, 1] = X_uu33
+    X[1, 4] = X_uu23
+    X[1, 5] = X_uu34
+    X[2, 2] = X_ww11
+    X[2, 3] = X_ww12
+    X[2, 6] = X_ww13
+    X[2, 7] = X_ww14
+    X[3, 3] = X_ww22
+    X[3, 6] = X_ww23
+    X[3, 7] = X_ww24
+    X[4, 4] = X_uu22
+    X[4, 5] = X_uu24
+    X[5, 5] = X_uu44
+    X[6, 6] = X_ww33
+    X[6, 7] = X_ww34
+    X[7, 7] = X_ww44
+
+    # Symmetrize the matrix
+    for row in range(8):
+        for col in range(row):
+            X[row, col] = X[col, row]
+
+def _fill_stiffness_matrix(X, I1, I2, I5, I6, I7, I8, I21, I22, I23, I24, I25, a_mu, b, t, K_x, K_y, K_1, K_xy):
+    # As per eq. 4.28,4.29 from [Milasinovic1997], see ``matrices.get_stiffness_matrix``
+    K_uu11 = ( K_x *I1/b  + K_xy*I2*b/3.) * t
+    K_uu12 = (-K_x *I1/b  + K_xy*I2*b/6.) * t
+    K_uu13 = (-K_1 *I5/2. - K_xy*I6/2.  ) * t * a_mu
+    K_uu14 = (-K_1 *I5/2. + K_xy*I6/2.  ) * t * a_mu
+    K_uu33 = ( K_xy*I8/b  + K_y *I7*b/3.) * t * a_mu**2
+    K_uu34 = (-K_xy*I8/b  + K_y *I7*b/6.) * t * a_mu**2
+    K_uu22 =   K_uu11
+    K_uu23 =  -K_uu14
+    K_uu24 =  -K_uu13
+    K_uu44 =   K_uu33
+
+    # As per eq. 4.18,4.19 from [Milasinovic1997]
+    t_3  = t**3 / 12.
+    D_11 = K_x  * t_3
+    D_22 = K_y  * t_3
+    D_12 = K_1  * t_3
+    D_66 = K_xy * t_3
+    K_ww11 =  12.*D_11*I21/b**3 -  6./5. *D_12*I22/b - 6./5. *D_12*I23/b + 13./35. *D_22*I24*b    + 24./5. *D_66*I25/b
+    K_ww12 =   6.*D_11*I21/b**2 - 11./10.*D_12*I22   - 1./10.*D_12*I23   + 11./210.*D_22*I24*b**2 +  2./5. *D_66*I25
+    K_ww13 = -12.*D_11*I21/b**3 +  6./5. *D_12*I22/b + 6./5. *D_12*I23/b + 18./140.*D_22*I24*b    - 24./5. *D_66*I25/b
+    K_ww14 =   6.*D_11*I21/b**2 -  1./10.*D_12*I23   - 1./10.*D_12*I22   - 26./840.*D_22*I24*b**2 +  2./5. *D_66*I25
+    K_ww22 =   4.*D_11*I21/b    -  2./15.*D_12*I22*b - 2./15.*D_12*I23*b +  2./210.*D_22*I24*b**3 +  8./15.*D_66*I25*b
+    K_ww24 =   2.*D_11*I21/b    +  2./60.*D_12*I22*b + 2./60.*D_12*I23*b -  6./840.*D_22*I24*b**3 -  2./15.*D_66*I25*b
+    K_ww34 =  -6.*D_11*I21/b**2 + 22./20.*D_12*I22   + 6./60.*D_12*I23   - 22./420.*D_22*I24*b**2 -  2./5. *D_66*I25
+    K_ww23 = -K_ww14
+    K_ww33 =  K_ww11
+    K_ww44 =  K_ww22
+
+    _fill_local_matrix(
+        X,
+        (K_uu11, K_uu12, K_uu13, K_uu14, K_uu22, K_uu23, K_uu24, K_uu33, K_uu34, K_uu44),
+        (K_ww11, K_ww12, K_ww13, K_ww14, K_ww22, K_ww23, K_ww24, K_ww33, K_ww34, K_ww44),
+    )
+
+def _fill_stress_matrix(X, I2, I7, I25, b, c):
+    # As per eq. 6.78-6.80 from [Milasinovic1997], see ``matrices.get_stress_matrix``
+    K_uu11 = (3. +    c)/24.*I2*b
+    K_uu12 = (1. +    c)/24.*I2*b
+    K_uu22 = (1. + 3.*c)/24.*I2*b
+    K_uu33 = (3. +    c)/24.*I7*b
+    K_uu34 = (1. +    c)/24.*I7*b
+    K_uu44 = (1. + 3.*c)/24.*I7*b
+
+    # As per eq. 6.74-6.77 from [Milasinovic1997]
+    K_ww11 = (10. +  3.*c)/70.  *I25*b
+    K_ww12 = (15. +  7.*c)/840. *I25*b**2
+    K_ww13 = ( 9. +  9.*c)/280. *I25*b
+    K_ww14 = (-7. -  6.*c)/840. *I25*b**2
+    K_ww22 = ( 5. +  3.*c)/1680.*I25*b**3
+    K_ww23 = ( 6. +  7.*c)/840. *I25*b**2
+    K_ww24 = (-1. -     c)/560. *I25*b**3
+    K_ww33 = ( 3. + 10.*c)/70.  *I25*b
+    K_ww34 = (-7. - 15.*c)/840. *I25*b**2
+    K_ww44 = ( 3. +  5.*c)/1680.*I25*b**3
+
+    _fill_local_matrix(
+        X,
+        (K_uu11, K_uu12, 0., 0., K_uu22, 0., 0., K_uu33, K_uu34, K_uu44),
+        (K_ww11, K_ww12, K_ww13, K_ww14, K_ww22, K_ww23, K_ww24, K_ww33, K_ww34, K_ww44),
+    )
+
+def _fill_mass_matrix(X, I1, I8, I21, b, t, ro):
+    # As per eq. 6.36 from [Milasinovic1997], see ``matrices.get_mass_matrix``
+    uu = t * ro
+    M_uu11 = I1*b/3. * uu
+    M_uu12 = M_uu11/2.
+    M_uu33 = I8*b/3. * uu
+    M_uu34 = M_uu33/2.
+
+    # As per eq. 6.31 from [Milasinovic1997]
+    ww = t * ro * I21
+    M_ww11 =  13./35. *b    * ww
+    M_ww12 =  11./210.*b**2 * ww
+    M_ww13 =   9./70. *b    * ww
+    M_ww14 = -13./420.*b**2 * ww
+    M_ww22 =   1./105.*b**3 * ww
+    M_ww24 = - 3./420.*b**3 * ww
+
+    _fill_local_matrix(
+        X,
+        (M_uu11, M_uu12, 0., 0., M_uu11, 0., 0., M_uu33, M_uu34, M_uu33),
+        (M_ww11, M_ww12, M_ww13, M_ww14, M_ww22, -M_ww14, M_ww24, M_ww11, -M_ww12, M_ww22),
+    )
+
+def _rotate_and_scatter(X_global, X, R, dofs):
+    # As per eq. 3.62 from [Milasinovic1997], ``X_global[dofs, dofs] += R.T * X * R``
+    for row in range(8):
+        for col in range(8):
+            value = 0.
+            for i in range(8):
+                if R[i, row] == 0.:
+                    continue
+                for j in range(8):
+                    value += R[i, row] * X[i, j] * R[j, col]
+            X_global[dofs[row], dofs[col]] += value
+
+def _assemble_global_matrices(integrals, a_mu, t_b, strip_b, strip_R, strip_dofs, strip_props, K_hat, K_sigma, M, X):
+    I1, I2, I5, I6, I7, I8, I21, I22, I23, I24, I25 = (
+        integrals[0], integrals[1], integrals[2], integrals[3], integrals[4], integrals[5],
+        integrals[6], integrals[7], integrals[8], integrals[9], integrals[10]
+    )
+
+    K_hat[:, :] = 0.
+    K_sigma[:, :] = 0.
+    M[:, :] = 0.
+
+    for s in range(strip_b.shape[0]):
+        b = strip_b[s]
+        R = strip_R[s]
+        dofs = strip_dofs[s]
+        t_s, ro, c, K_x, K_y, K_1, K_xy = (
+            strip_props[s, 0], strip_props[s, 1], strip_props[s, 2], strip_props[s, 3],
+            strip_props[s, 4], strip_props[s, 5], strip_props[s, 6]
+        )
+
+        t = t_b * t_s # [mm] strip thickness
+
+        _fill_stiffness_matrix(X, I1, I2, I5, I6, I7, I8, I21, I22, I23, I24, I25, a_mu, b, t, K_x, K_y, K_1, K_xy)
+        _rotate_and_scatter(K_hat, X, R, dofs)
+
+        _fill_stress_matrix(X, I2, I7, I25, b, c)
+        _rotate_and_scatter(K_sigma, X, R, dofs)
+
+        _fill_mass_matrix(X, I1, I8, I21, b, t, ro)
+        _rotate_and_scatter(M, X, R, dofs)
+
+if njit is not None:
+    _fill_local_matrix = njit(cache=True)(_fill_local_matrix)
+    _fill_stiffness_matrix = njit(cache=True)(_fill_stiffness_matrix)
+    _fill_stress_matrix = njit(cache=True)(_fill_stress_matrix)
+    _fill_mass_matrix = njit(cache=True)(_fill_mass_matrix)
+    _rotate_and_scatter = njit(cache=True)(_rotate_and_scatter)
+    _assemble_global_matrices = njit(cache=True)(_assemble_global_matrices)
+
+
+class CompiledGlobalMatrices(object):
+    """
+    Drop-in replacement for ``matrices.compute_global_matrices``, fusing the
+    local matrix evaluation, rotation and scatter into a single compiled loop
+    over strips. The returned matrices are preallocated buffers, overwritten
+    by the next call.
+    """
+
+    def __init__(self, strip_data, materials, astiff_shape):
+        material_data_keys = 't_s, ro, c, K_x, K_y, K_1, K_xy'.split(', ')
+
+        # Deduced from Fortran block 83:94, same as ``load.get_nodal_graph``
+        dof_offsets = np.arange(ASTIFF_BLOCK_SIZE)
+        self.strip_dofs = np.array([
+            np.concatenate([ASTIFF_BLOCK_SIZE*(node1_id-1) + dof_offsets, ASTIFF_BLOCK_SIZE*(node2_id-1) + dof_offsets])
+            for node1_id, node2_id, _ in strip_data
+        ], dtype=np.int64)
+        self.strip_b = np.array([edge_data['b'] for _, _, edge_data in strip_data], dtype=np.float64)
+        self.strip_R = np.array([np.asarray(edge_data['R']) for _, _, edge_data in strip_data], dtype=np.float64)
+        self.strip_props = np.array([
+            [materials[edge_data['material_id']][k] for k in material_data_keys]
+            for _, _, edge_data in strip_data
+        ], dtype=np.float64)
+
+        self.K_hat   = np.zeros(astiff_shape) # global stiffness matrix
+        self.K_sigma = np.zeros(astiff_shape) # global stress matrix
+        self.M       = np.zeros(astiff_shape) # global mass matrix
+        self.X       = np.zeros((2*ASTIFF_BLOCK_SIZE, 2*ASTIFF_BLOCK_SIZE)) # local strip matrix
+
+    def assemble(self, stiffness_integrals, a_mu, t_b):
+        _assemble_global_matrices(
+            np.array(stiffness_integrals, dtype=np.float64), float(a_mu), float(t_b),
+            self.strip_b, self.strip_R, self.strip_dofs, self.strip_props,
+            self.K_hat, self.K_sigma, self.M, self.X
+        )
+        return np.asmatrix(self.K_hat), np.asmatrix(self.K_sigma), np.asmatrix(self.M)
+
+    def __call__(self, integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m):
+        stiffness_integrals, a_mu = get_mode_integrals(integral_db, beam_type, a, m)
+        return self.assemble(stiffness_integrals, a_mu, t_b)
+
+def check_backend_parity(compiled, strip_data, materials, astiff_shape, rtol=BACKEND_PARITY_RTOL):
+    # Compare against the reference implementation on arbitrary, but fixed, integral values
+    stiffness_integrals = tuple(np.linspace(0.5, 1.5, 11))
+    a_mu, t_b = 123.4, 5.6
+
+    expected = assemble_global_matrices(stiffness_integrals, a_mu, strip_data, materials, astiff_shape, t_b)
+    actual = compiled.assemble(stiffness_integrals, a_mu, t_b)
+    for name, X_expected, X_actual in zip(['K_hat', 'K_sigma', 'M'], expected, actual):
+        # Rotating the inclined strips leaves rounding noise in the otherwise
+        # zero entries, so the absolute tolerance follows the matrix scale
+        atol = rtol * np.abs(X_expected).max()
+        assert np.allclose(X_actual, X_expected, rtol=rtol, atol=atol), "'%s' differs from the reference implementation" % name
+
+def get_global_matrices_backend(backend, strip_data, materials, astiff_shape):
+    assert backend in BACKEND_CHOICES
+
+    if backend == 'numba' and njit is None:
+        logger.warn('Numba is not installed, falling back to the pure Python backend...')
+        backend = 'python'
+
+    if backend == 'python':
+        return compute_global_matrices
+
+    # Compiles the kernels on the first call, then verifies them
+    compiled = CompiledGlobalMatrices(strip_data, materials, astiff_shape)
+    try:
+        check_backend_parity(compiled, strip_data, materials, astiff_shape)
+    except AssertionError as e:
+        # Don't raise, as this runs in the worker pool initializers
+        logger.error('%s, falling back to the pure Python backend...', e)
+        return compute_global_matrices
+
+    return compiled
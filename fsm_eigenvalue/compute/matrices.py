@@ -5,6 +5,9 @@ from .integral_db import get_scaled_integral
 from .utils import assemble_local_matrix
 
 
+STIFFNESS_COEFFICIENTS = 'K_x, K_y, K_1, K_xy'.split(', ')
+
+
 def get_stiffness_matrix(I1, I2, I5, I6, I7, I8, I21, I22, I23, I24, I25, a_mu, b, t, K_x, K_y, K_1, K_xy):
     # As per eq. 4.28,4.29 from [Milasinovic1997]
     K_uu11 = ( K_x *I1/b  + K_xy*I2*b/3.) * t
@@ -100,7 +103,15 @@ def get_mass_matrix(I1, I8, I21, b, t, ro):
         X_ww=np.array([M_ww11, M_ww12, M_ww13, M_ww14, M_ww22, M_ww23, M_ww24, M_ww33, M_ww34, M_ww44]) * t * ro * I21,
     )
 
-def compute_global_matrices(integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m):
+def scatter_strip_matrix(X, X_strip, R, astiff_fill_indices):
+    # As per eq. 3.62 from [Milasinovic1997]
+    X_strip = R.T * X_strip * R
+
+    # Deduced from Fortran block 83:94
+    for astiff_indices, segment_indices in astiff_fill_indices:
+        X[astiff_indices] += X_strip[segment_indices]
+
+def get_mode_integrals(integral_db, beam_type, a, m):
     def get_integral(integral_id):
         return get_scaled_integral(integral_db, integral_id, a, m=m, n=m)
 
@@ -113,6 +124,15 @@ def compute_global_matrices(integral_db, beam_type, strip_data, materials, astif
     mu_m = float(find_best_root(beam_type, mode=m))
     a_mu = a / mu_m
 
+    return (I1, I2, I5, I6, I7, I8, I21, I22, I23, I24, I25), a_mu
+
+def compute_global_matrices(integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m):
+    stiffness_integrals, a_mu = get_mode_integrals(integral_db, beam_type, a, m)
+    return assemble_global_matrices(stiffness_integrals, a_mu, strip_data, materials, astiff_shape, t_b)
+
+def assemble_global_matrices(stiffness_integrals, a_mu, strip_data, materials, astiff_shape, t_b):
+    I1, I2, I5, I6, I7, I8, I21, I22, I23, I24, I25 = stiffness_integrals
+
     K_hat   = np.asmatrix(np.zeros(astiff_shape)) # global stiffness matrix
     K_sigma = np.asmatrix(np.zeros(astiff_shape)) # global stress matrix
     M       = np.asmatrix(np.zeros(astiff_shape)) # global mass matrix
@@ -134,15 +154,67 @@ def compute_global_matrices(integral_db, beam_type, strip_data, materials, astif
         K_sigma_strip = get_stress_matrix(I2, I7, I25, b, c)
         M_strip = get_mass_matrix(I1, I8, I21, b, t, ro)
 
-        # As per eq. 3.62 from [Milasinovic1997]
-        K_hat_strip   = R.T * K_hat_strip   * R
-        K_sigma_strip = R.T * K_sigma_strip * R
-        M_strip       = R.T * M_strip       * R
-
-        # Deduced from Fortran block 83:94
-        for astiff_indices, segment_indices in astiff_fill_indices:
-            K_hat  [astiff_indices] += K_hat_strip  [segment_indices]
-            K_sigma[astiff_indices] += K_sigma_strip[segment_indices]
-            M      [astiff_indices] += M_strip      [segment_indices]
+        scatter_strip_matrix(K_hat,   K_hat_strip,   R, astiff_fill_indices)
+        scatter_strip_matrix(K_sigma, K_sigma_strip, R, astiff_fill_indices)
+        scatter_strip_matrix(M,       M_strip,       R, astiff_fill_indices)
 
     return K_hat, K_sigma, M
+
+def compute_global_matrix_components(integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m, swept_material_ids):
+    # ``get_stiffness_matrix`` is linear in ``K_x, K_y, K_1, K_xy``, therefore
+    # the global stiffness matrix is split into the constant part (keyed by
+    # ``None``), contributed by the materials not being swept, and a unit
+    # component per each ``(material_id, stiffness_coefficient)`` of the swept
+    # materials. See ``combine_stiffness_components`` for the inverse.
+    stiffness_integrals, a_mu = get_mode_integrals(integral_db, beam_type, a, m)
+    I1, I2, I5, I6, I7, I8, I21, I22, I23, I24, I25 = stiffness_integrals
+
+    K_hat_components = {
+        key: np.asmatrix(np.zeros(astiff_shape))
+        for key in [None] + [
+            (material_id, coef)
+            for material_id in swept_material_ids
+            for coef in STIFFNESS_COEFFICIENTS
+        ]
+    }
+    K_sigma = np.asmatrix(np.zeros(astiff_shape)) # global stress matrix
+    M       = np.asmatrix(np.zeros(astiff_shape)) # global mass matrix
+
+    edge_data_keys = 'material_id, b, R, astiff_fill_indices'.split(', ')
+    material_data_keys = 't_s, ro, c'.split(', ')
+    for _, _, edge_data in strip_data:
+        material_id, b, R, astiff_fill_indices = (edge_data[k] for k in edge_data_keys)
+
+        material = materials[material_id]
+        t_s, ro, c = (material[k] for k in material_data_keys)
+
+        t = t_b * t_s # [mm] strip thickness
+
+        if material_id in swept_material_ids:
+            for coef in STIFFNESS_COEFFICIENTS:
+                unit_coefs = tuple(1. if k == coef else 0. for k in STIFFNESS_COEFFICIENTS)
+                K_hat_strip = get_stiffness_matrix(*stiffness_integrals + (a_mu, b, t) + unit_coefs)
+                scatter_strip_matrix(K_hat_components[material_id, coef], K_hat_strip, R, astiff_fill_indices)
+        else:
+            coefs = tuple(material[k] for k in STIFFNESS_COEFFICIENTS)
+            K_hat_strip = get_stiffness_matrix(*stiffness_integrals + (a_mu, b, t) + coefs)
+            scatter_strip_matrix(K_hat_components[None], K_hat_strip, R, astiff_fill_indices)
+
+        K_sigma_strip = get_stress_matrix(I2, I7, I25, b, c)
+        M_strip = get_mass_matrix(I1, I8, I21, b, t, ro)
+
+        scatter_strip_matrix(K_sigma, K_sigma_strip, R, astiff_fill_indices)
+        scatter_strip_matrix(M,       M_strip,       R, astiff_fill_indices)
+
+    return K_hat_components, K_sigma, M
+
+def combine_stiffness_components(K_hat_components, materials):
+    K_hat = K_hat_components[None].copy()
+    for key, K_hat_component in K_hat_components.items():
+        if key is None:
+            continue
+
+        material_id, coef = key
+        K_hat += materials[material_id][coef] * K_hat_component
+
+    return K_hat
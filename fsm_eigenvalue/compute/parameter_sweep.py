@@ -1,49 +1,281 @@
+import collections
 from contextlib import contextmanager
 import itertools
 import multiprocessing
+import os
+import pickle
+import tempfile
 
 from beam_integrals.beam_types import BaseBeamType
+import numpy as np
 from simple_plugins import AttrDict
 
-from .core import get_modal_composite, perform_iteration
+from .. import DEFAULT_BACKEND
+from ..load import get_material_axes, load_model_from
+from ..store import (
+    get_hdf5_table_description, get_modal_composite_rows, with_material_axes,
+    MODAL_COMPOSITES_TABLE_SPEC, RAW_RESULTS_TABLE_SPEC
+)
+from .core import add_material_values, get_modal_composite, perform_iteration, perform_material_sweep_iteration
 from .integral_db import check_for_integral_db, open_integral_db
+from .kernels import get_global_matrices_backend
+from .result_cache import find_result_cache, get_result_cache_key, lookup_cached_results, open_result_cache
+
+
+ResultsBlock = collections.namedtuple('ResultsBlock', 'raw_results, modal_composites')
 
 
 def _init_pool(*data):
     global _pool_data
 
-    data_keys = 'beam_type_id, search_space, strip_data, materials, astiff_shape'.split(', ')
+    data_keys = 'beam_type_id, search_space, strip_data, materials, astiff_shape, result_cache_filename, backend, chunk_writer'.split(', ')
     _pool_data = AttrDict(zip(data_keys, data))
 
     _pool_data.beam_type = BaseBeamType.coerce(_pool_data.beam_type_id)
     _pool_data.integral_db = open_integral_db(_pool_data.beam_type_id)
+    _pool_data.result_cache = (
+        open_result_cache(_pool_data.result_cache_filename) if _pool_data.result_cache_filename else None
+    )
+
+    _prepare_pool_model()
+
+def _prepare_pool_model():
+    c = _pool_data
+
+    c.material_axes = get_material_axes(c.search_space)
+    c.material_points = list(itertools.product(
+        *(c.search_space[key] for key, _, _ in c.material_axes)
+    ))
+
+    # Compile the kernels once per worker (and model), if needed
+    c.compute_matrices = get_global_matrices_backend(
+        c.backend, c.strip_data, c.materials, c.astiff_shape
+    )
 
 def _worker(args):
     a, t_b = args
     c = _pool_data
 
+    return _material_sweep_iteration(a, t_b) if c.material_axes else _iteration(a, t_b)
+
+def _chunk_worker(a):
+    c = _pool_data
+
+    # Let the store backend write a whole ``t_b`` row of results directly from the worker
+    c.chunk_writer(a, [_worker((a, t_b)) for t_b in c.search_space['t_b']])
+
+    # Don't send the results back to the parent process, only the progress
+    return [(a, t_b, [], []) for t_b in c.search_space['t_b']]
+
+def _iteration(a, t_b):
+    c = _pool_data
+
+    # Compute only the modes missing from the result cache, if any
+    cached_results = lookup_cached_results(c.result_cache, a, t_b) if c.result_cache else {}
     raw_results = [
-        perform_iteration(c.integral_db, c.beam_type, c.strip_data, c.materials, c.astiff_shape, a, t_b, m)
+        cached_results[m] if m in cached_results else
+        perform_iteration(c.integral_db, c.beam_type, c.strip_data, c.materials, c.astiff_shape, a, t_b, m, c.compute_matrices)
         for m in c.search_space['m']
     ]
     modal_composite = get_modal_composite(raw_results)
 
     return a, t_b, raw_results, modal_composite
 
+def _material_sweep_iteration(a, t_b):
+    c = _pool_data
+
+    point_raw_results = collections.OrderedDict(
+        (material_values, []) for material_values in c.material_points
+    )
+    for m in c.search_space['m']:
+        for material_values, raw_result in perform_material_sweep_iteration(
+            c.integral_db, c.beam_type, c.strip_data, c.materials, c.astiff_shape, a, t_b, m,
+            c.material_axes, c.material_points
+        ):
+            point_raw_results[material_values].append(raw_result)
+
+    raw_results = []
+    modal_composites = []
+    for material_values, modal_raw_results in point_raw_results.items():
+        raw_results.extend(
+            add_material_values(raw_result, material_values)
+            for raw_result in modal_raw_results
+        )
+        modal_composites.append(add_material_values(get_modal_composite(modal_raw_results), material_values))
+
+    return a, t_b, raw_results, modal_composites
+
 @contextmanager
-def parameter_sweep(beam_type_id, search_space, strip_data, materials, astiff_shape, purge_integral_db_cache=False):
+def parameter_sweep(beam_type_id, search_space, strip_data, materials, astiff_shape, purge_integral_db_cache=False, use_result_cache=False,
+                    backend=DEFAULT_BACKEND, workers=None, chunk_writer=None):
+    # Yields ``(a, t_b, raw_results, modal_composite)`` per iteration, or
+    # ``(a, t_b, raw_results, modal_composites)`` with one modal composite
+    # per material point if there are any material property axes
+    # Result cache rows don't support the material property axes
+    assert not (use_result_cache and get_material_axes(search_space))
+
     check_for_integral_db(beam_type_id, purge_cache=purge_integral_db_cache)
 
+    result_cache_filename = None
+    if use_result_cache:
+        result_cache_filename = find_result_cache(
+            get_result_cache_key(beam_type_id, strip_data, materials, astiff_shape)
+        )
+
     try:
         pool = multiprocessing.Pool(
+            processes=workers, # Use all the available CPUs by default
             initializer=_init_pool,
-            initargs=(beam_type_id, search_space, strip_data, materials, astiff_shape),
+            initargs=(beam_type_id, search_space, strip_data, materials, astiff_shape, result_cache_filename, backend, chunk_writer),
         )
 
-        yield pool.imap(
-            func=_worker,
-            iterable=itertools.product(search_space['a'], search_space['t_b']),
-            chunksize=len(search_space['t_b'])
-        )
+        if chunk_writer:
+            yield itertools.chain.from_iterable(pool.imap(func=_chunk_worker, iterable=search_space['a']))
+        else:
+            yield pool.imap(
+                func=_worker,
+                iterable=itertools.product(search_space['a'], search_space['t_b']),
+                chunksize=len(search_space['t_b'])
+            )
     finally:
         pool.terminate()
+
+
+def _init_engine_pool(beam_type_id, backend):
+    global _pool_data
+
+    # The model is loaded once per sweep, see ``_engine_worker``
+    _pool_data = AttrDict(
+        beam_type_id=beam_type_id,
+        backend=backend,
+        model_id=None,
+        result_cache=None,
+        chunk_writer=None,
+    )
+
+    _pool_data.beam_type = BaseBeamType.coerce(beam_type_id)
+    _pool_data.integral_db = open_integral_db(beam_type_id)
+
+def _engine_worker(args):
+    model_id, model_filename, a = args
+    c = _pool_data
+
+    # Load and prepare the model only once per worker and sweep, not once per task
+    if c.model_id != model_id:
+        with open(model_filename, 'rb') as fp:
+            model = pickle.load(fp)
+        for key, value in model.items():
+            setattr(c, key, value)
+        c.model_id = model_id
+        _prepare_pool_model()
+
+    raw_results = []
+    modal_composites = []
+    for t_b in c.search_space['t_b']:
+        _, _, iteration_raw_results, iteration_modal_composites = (
+            _material_sweep_iteration(a, t_b) if c.material_axes else _iteration(a, t_b)
+        )
+        raw_results.extend(iteration_raw_results)
+        modal_composites.extend(get_modal_composite_rows(iteration_modal_composites, c.material_axes))
+
+    return ResultsBlock(
+        raw_results=np.array(raw_results, dtype=c.raw_results_dtype),
+        modal_composites=np.array(modal_composites, dtype=c.modal_composites_dtype),
+    )
+
+
+class SweepEngine(object):
+    """
+    Reusable in-memory parameter sweep engine, keeping its worker pool alive
+    between sweeps. Results are streamed as ``ResultsBlock`` structured NumPy
+    arrays, one per strip length, with the dtypes of the HDF5 results tables.
+
+    Closing a ``sweep`` generator before it's exhausted restarts the worker
+    pool, dropping the queued tasks of that sweep, so they can't hold up the
+    next one.
+    """
+
+    def __init__(self, beam_type_id, workers=None, backend=DEFAULT_BACKEND, purge_integral_db_cache=False):
+        check_for_integral_db(beam_type_id, purge_cache=purge_integral_db_cache)
+
+        self.beam_type_id = beam_type_id
+        self.pool_options = dict(
+            processes=workers, # Use all the available CPUs by default
+            initializer=_init_engine_pool,
+            initargs=(beam_type_id, backend),
+        )
+        self.pool = multiprocessing.Pool(**self.pool_options)
+        self.model_ids = itertools.count(1)
+
+    def _load_model(self, geometry, materials, search_space):
+        # ``geometry`` and ``materials`` follow the data file format, while
+        # ``search_space`` axes are explicitly listed values
+        assert geometry.get('beam_type_id', self.beam_type_id) == self.beam_type_id
+
+        search_space, strip_data, materials, astiff_shape = load_model_from(geometry, materials, search_space)
+        material_axes = get_material_axes(search_space)
+        return dict(
+            search_space=search_space,
+            strip_data=strip_data,
+            materials=materials,
+            astiff_shape=astiff_shape,
+            raw_results_dtype=get_hdf5_table_description(
+                with_material_axes(RAW_RESULTS_TABLE_SPEC, material_axes), astiff_shape[0]
+            ),
+            modal_composites_dtype=get_hdf5_table_description(
+                with_material_axes(MODAL_COMPOSITES_TABLE_SPEC, material_axes), astiff_shape[0]
+            ),
+        )
+
+    def sweep(self, geometry, materials, search_space, callback=None):
+        return self._sweep_model(self._load_model(geometry, materials, search_space), callback)
+
+    def _sweep_model(self, model, callback=None):
+        # Send the model to the workers only once per sweep, instead of pickling it into every task
+        fd, model_filename = tempfile.mkstemp(prefix='fsm_eigenvalue-', suffix='.pickle')
+        with os.fdopen(fd, 'wb') as fp:
+            pickle.dump(model, fp, pickle.HIGHEST_PROTOCOL)
+
+        model_id = next(self.model_ids)
+        tasks = ((model_id, model_filename, a) for a in model['search_space']['a'])
+        completed = False
+        try:
+            for block in self.pool.imap(_engine_worker, tasks):
+                if callback:
+                    callback(block)
+
+                yield block
+
+            completed = True
+        finally:
+            if not completed and self.pool is not None:
+                self.pool.terminate()
+                self.pool = multiprocessing.Pool(**self.pool_options)
+
+            os.remove(model_filename)
+
+    def run(self, geometry, materials, search_space, callback=None):
+        model = self._load_model(geometry, materials, search_space)
+
+        # Start with empty blocks, so that even sweeping through no strip lengths returns the right dtypes
+        blocks = [ResultsBlock(
+            raw_results=np.empty(0, dtype=model['raw_results_dtype']),
+            modal_composites=np.empty(0, dtype=model['modal_composites_dtype']),
+        )]
+        blocks.extend(self._sweep_model(model, callback))
+
+        return ResultsBlock(
+            raw_results=np.concatenate([block.raw_results for block in blocks]),
+            modal_composites=np.concatenate([block.modal_composites for block in blocks]),
+        )
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
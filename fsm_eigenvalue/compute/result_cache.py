@@ -0,0 +1,213 @@
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from timeit import default_timer as timer
+
+import numpy as np
+import tables as tb
+
+from .. import __version__, BASE_CACHE_DIR
+from ..store import create_table, get_filters, RAW_RESULTS_TABLE_SPEC
+from .integral_db import INTEGRAL_DB_URL_FMT
+
+
+logger = logging.getLogger(__name__)
+
+
+RESULT_CACHE_DIR = os.path.join(BASE_CACHE_DIR, 'results')
+RESULT_CACHE_MAX_SIZE = 10 * 1024**3 # [B]
+RESULT_CACHE_DECIMALS = 6 # ``a`` and ``t_b`` are matched up to this many decimals
+RESULT_CACHE_READ_BUFFER_SIZE = 16 * 1024**2 # [B]
+
+
+def get_result_cache_key(beam_type_id, strip_data, materials, astiff_shape):
+    # Content address of everything a single ``perform_iteration`` depends on,
+    # apart from the ``(a, t_b, m)`` point itself. The integral db URL and the
+    # package version are included as they change with every integral db
+    # release and solver change, respectively.
+    material_data_keys = 't_s, ro, c, K_x, K_y, K_1, K_xy'.split(', ')
+    content = dict(
+        version=__version__,
+        beam_type_id=beam_type_id,
+        integral_db=INTEGRAL_DB_URL_FMT,
+        astiff_shape=list(astiff_shape),
+        strips=[
+            [node1_id, node2_id, edge_data['material_id'], float(edge_data['b']), edge_data['R'].tolist()]
+            for node1_id, node2_id, edge_data in strip_data
+        ],
+        materials={
+            material_id: [float(material[k]) for k in material_data_keys]
+            for material_id, material in materials.items()
+        },
+    )
+
+    return hashlib.sha1(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+def get_result_cache_filename(cache_key):
+    return os.path.join(RESULT_CACHE_DIR, "%s.hdf5" % cache_key)
+
+def find_result_cache(cache_key):
+    cache_filename = get_result_cache_filename(cache_key)
+    try:
+        if tb.is_hdf5_file(cache_filename):
+            logger.info("Valid result cache file '%s' found", cache_filename)
+            os.utime(cache_filename, None) # Mark as recently used, for eviction purposes
+            return cache_filename
+    except (IOError, tb.HDF5ExtError):
+        pass
+
+    logger.info("No result cache found for '%s', all points will be computed", cache_key)
+    return None
+
+def open_result_cache(cache_filename):
+    return tb.open_file(cache_filename, 'r')
+
+def lookup_cached_results(result_cache, a, t_b):
+    tolerance = 0.5 * 10**-RESULT_CACHE_DECIMALS
+    matches = result_cache.root.raw_results.read_where(
+        '(a > a_lo) & (a < a_hi) & (t_b > t_b_lo) & (t_b < t_b_hi)',
+        condvars=dict(a_lo=a-tolerance, a_hi=a+tolerance, t_b_lo=t_b-tolerance, t_b_hi=t_b+tolerance)
+    )
+
+    # Use the requested ``(a, t_b)``, as the cached values may differ in the last few bits
+    return {
+        int(row['m']): (a, t_b) + tuple(row)[2:]
+        for row in matches
+    }
+
+def _round_points(values):
+    return np.round(values, RESULT_CACHE_DECIMALS)
+
+def _iterate_row_buffers(table):
+    # Rows are wide for large sections, due to the mode shape vectors, so size the buffer in bytes
+    buffer_rows = max(1, RESULT_CACHE_READ_BUFFER_SIZE // table.rowsize)
+    for start_row in xrange(0, table.nrows, buffer_rows):
+        yield table.read(start_row, start_row + buffer_rows)
+
+def update_result_cache(cache_key, results_file, search_space, astiff_shape, max_size=RESULT_CACHE_MAX_SIZE):
+    cache_filename = get_result_cache_filename(cache_key)
+    cache_dirname = os.path.dirname(cache_filename)
+
+    # The cache entry holds at least all the new results, so don't bother
+    # copying them if the entry would be evicted right away anyway
+    results_size = os.path.getsize(results_file)
+    if results_size > max_size:
+        logger.warn(
+            "Not updating the result cache, the results file '%s' (%d bytes) exceeds the result cache size limit "
+            "(%d bytes), see '--result-cache-max-size'", results_file, results_size, max_size
+        )
+        return None
+
+    if not os.path.exists(cache_dirname):
+        logger.info("Creating the result cache directory '%s'...", RESULT_CACHE_DIR)
+        os.makedirs(cache_dirname)
+
+    logger.info("Updating the result cache file '%s'...", cache_filename)
+    start = timer()
+
+    # Use a unique temporary file, as concurrent runs may update the same cache entry
+    fd, temp_filename = tempfile.mkstemp(suffix='.tmp', dir=cache_dirname)
+    os.close(fd)
+    try:
+        _write_result_cache(cache_filename, temp_filename, cache_key, results_file, search_space, astiff_shape)
+        shutil.move(temp_filename, cache_filename)
+    except:
+        os.remove(temp_filename)
+        raise
+
+    logger.info("Result cache update completed in %f second(s)", timer() - start)
+
+    return cache_filename
+
+def _write_result_cache(cache_filename, temp_filename, cache_key, results_file, search_space, astiff_shape):
+    with tb.open_file(results_file, 'r') as src, \
+         tb.open_file(temp_filename, 'w', filters=get_filters()) as out:
+        out.root._v_attrs.cache_key = cache_key
+        out.root._v_attrs.data_file = src.root._v_attrs.data_file
+
+        new_results = src.root.parameter_sweep.raw_results
+        old_cache = open_result_cache(cache_filename) if os.path.exists(cache_filename) else None
+        try:
+            expectedrows = new_results.nrows + (old_cache.root.raw_results.nrows if old_cache else 0)
+            with create_table(
+                out, out.root, 'raw_results',
+                table_spec=RAW_RESULTS_TABLE_SPEC,
+                vector_shape=astiff_shape[0],
+                expectedrows=expectedrows,
+                indexes=['a', 't_b', 'm']
+            ) as table:
+                for rows in _iterate_row_buffers(new_results):
+                    table.append(rows)
+
+                # Keep only the previously cached points outside of the current search space
+                if old_cache:
+                    for rows in _iterate_row_buffers(old_cache.root.raw_results):
+                        superseded = (
+                            np.in1d(_round_points(rows['a']), _round_points(search_space['a'])) &
+                            np.in1d(_round_points(rows['t_b']), _round_points(search_space['t_b'])) &
+                            np.in1d(rows['m'], search_space['m'])
+                        )
+                        table.append(rows[~superseded])
+        finally:
+            if old_cache:
+                old_cache.close()
+
+def get_result_cache_entries():
+    if not os.path.exists(RESULT_CACHE_DIR):
+        return []
+
+    entries = []
+    for filename in os.listdir(RESULT_CACHE_DIR):
+        cache_filename = os.path.join(RESULT_CACHE_DIR, filename)
+        if not filename.endswith('.hdf5'):
+            continue
+
+        stat = os.stat(cache_filename)
+        with open_result_cache(cache_filename) as f:
+            num_rows = f.root.raw_results.nrows
+
+        entries.append(dict(
+            cache_key=os.path.splitext(filename)[0],
+            filename=cache_filename,
+            size=stat.st_size,
+            num_rows=num_rows,
+            last_used_at=datetime.fromtimestamp(stat.st_mtime),
+        ))
+
+    # Least recently used entries come first
+    return sorted(entries, key=lambda x: x['last_used_at'])
+
+def prune_result_cache(max_size=RESULT_CACHE_MAX_SIZE, keep=None):
+    entries = get_result_cache_entries()
+    total_size = sum(entry['size'] for entry in entries)
+
+    for entry in entries:
+        if total_size <= max_size:
+            break
+
+        # Never evict the entry which was just written
+        if entry['filename'] == keep:
+            continue
+
+        logger.warn("Evicting the result cache file '%s' (%d bytes)...", entry['filename'], entry['size'])
+        os.remove(entry['filename'])
+        total_size -= entry['size']
+
+    if total_size > max_size:
+        logger.warn(
+            "The result cache (%d bytes) still exceeds its size limit (%d bytes), as its most recent entry "
+            "'%s' was kept", total_size, max_size, keep
+        )
+
+    return total_size
+
+def purge_result_cache():
+    if not os.path.exists(RESULT_CACHE_DIR):
+        return
+
+    logger.warn("Purging the result cache directory '%s'...", RESULT_CACHE_DIR)
+    shutil.rmtree(RESULT_CACHE_DIR)
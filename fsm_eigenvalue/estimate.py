@@ -0,0 +1,159 @@
+import itertools
+import logging
+import multiprocessing
+import resource
+import sys
+from timeit import default_timer as timer
+
+from beam_integrals.beam_types import BaseBeamType
+import numpy as np
+
+from . import DEFAULT_BACKEND, DEFAULT_COMPLEVEL, DEFAULT_COMPLIB
+from .compute.core import add_material_values, perform_iteration, perform_material_sweep_iteration
+from .compute.integral_db import check_for_integral_db, open_integral_db
+from .compute.kernels import get_global_matrices_backend
+from .load import get_material_axes
+from .store import (
+    get_hdf5_table_description, get_results_indexes, get_table_chunk_rows, measure_sample_table, with_material_axes,
+    MODAL_COMPOSITES_TABLE_SPEC, RAW_RESULTS_TABLE_SPEC
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ESTIMATE_SAMPLE_SIZE = 20
+
+
+def get_peak_memory_usage():
+    # ``ru_maxrss`` is in [kB] on Linux, but in [B] on macOS
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_memory if sys.platform == 'darwin' else peak_memory * 1024
+
+def sample_search_space_points(search_space, sample_size):
+    return [
+        tuple(np.random.choice(search_space[key]) for key in ('a', 't_b', 'm'))
+        for _ in xrange(sample_size)
+    ]
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    return "%dd %02dh %02dm %02ds" % (days, hours, minutes, seconds)
+
+def benchmark_sample_points(beam_type_id, search_space, strip_data, materials, astiff_shape, points,
+                            backend=DEFAULT_BACKEND):
+    # Runs in a worker process, so that the peak memory usage is that of a parameter sweep worker
+    material_axes = get_material_axes(search_space)
+    material_points = list(itertools.product(*(search_space[key] for key, _, _ in material_axes)))
+
+    beam_type = BaseBeamType.coerce(beam_type_id)
+    integral_db = open_integral_db(beam_type_id)
+    compute_matrices = get_global_matrices_backend(backend, strip_data, materials, astiff_shape)
+
+    def perform_sample_iteration(a, t_b, m):
+        if material_axes:
+            return [
+                add_material_values(raw_result, material_values)
+                for material_values, raw_result in perform_material_sweep_iteration(
+                    integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m,
+                    material_axes, material_points
+                )
+            ]
+
+        return [perform_iteration(integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m, compute_matrices)]
+
+    perform_sample_iteration(*points[0]) # Warm up the caches, excluded from timings
+
+    sample_rows = []
+    timings = []
+    try:
+        for a, t_b, m in points[1:]:
+            start = timer()
+            sample_rows.extend(perform_sample_iteration(a, t_b, m))
+            timings.append(timer() - start)
+    finally:
+        integral_db.close()
+
+    return sample_rows, timings, get_peak_memory_usage()
+
+def estimate_costs(results_file, beam_type_id, search_space, strip_data, materials, astiff_shape,
+                   sample_size=DEFAULT_ESTIMATE_SAMPLE_SIZE, workers=None, backend=DEFAULT_BACKEND,
+                   complib=DEFAULT_COMPLIB, complevel=DEFAULT_COMPLEVEL, bitshuffle=False, fletcher32=True,
+                   purge_integral_db_cache=False, chunkshape=None):
+    check_for_integral_db(beam_type_id, purge_cache=purge_integral_db_cache)
+
+    workers = workers or multiprocessing.cpu_count()
+    astiff_size = astiff_shape[0]
+    material_axes = get_material_axes(search_space)
+    num_material_points = int(np.prod([len(search_space[key]) for key, _, _ in material_axes]))
+
+    num_points = len(search_space['a']) * len(search_space['t_b']) * len(search_space['m'])
+    num_raw_results = num_points * num_material_points
+    num_modal_composites = len(search_space['a']) * len(search_space['t_b']) * num_material_points
+
+    raw_results_spec = with_material_axes(RAW_RESULTS_TABLE_SPEC, material_axes)
+    raw_row_size = get_hdf5_table_description(raw_results_spec, astiff_size).itemsize
+    modal_row_size = get_hdf5_table_description(
+        with_material_axes(MODAL_COMPOSITES_TABLE_SPEC, material_axes), astiff_size
+    ).itemsize
+    uncompressed_size = num_raw_results * raw_row_size + num_modal_composites * modal_row_size
+
+    # Sample enough points to fill at least a single chunk of the raw results table
+    chunk_rows = get_table_chunk_rows(raw_results_spec, astiff_size, num_raw_results, chunkshape)
+    sample_size = max(sample_size, -(-chunk_rows // num_material_points))
+
+    logger.info('Micro-benchmarking a random sample of %d (a, t_b, m) points in a worker process...', sample_size)
+    pool = multiprocessing.Pool(processes=1)
+    try:
+        sample_rows, timings, worker_peak_memory = pool.apply(benchmark_sample_points, (
+            beam_type_id, search_space, strip_data, materials, astiff_shape,
+            sample_search_space_points(search_space, sample_size + 1), backend
+        ))
+    finally:
+        pool.close()
+        pool.join()
+
+    # The parent process writes all the raw results serially, and creates the indexes once all of them are written
+    logger.info('Micro-benchmarking the results file writes on a sample of %d row(s)...', len(sample_rows))
+    sample_table = measure_sample_table(
+        results_file, raw_results_spec, astiff_size, sample_rows, num_raw_results, get_results_indexes(search_space)['raw_results'],
+        complib=complib, complevel=complevel, bitshuffle=bitshuffle, fletcher32=fletcher32, chunkshape=chunkshape
+    )
+    compression_ratio = sample_table['compression_ratio']
+    write_time = sample_table['write_time'] * num_raw_results / sample_table['rows']
+    index_time = sample_table['index_time'] * num_raw_results / sample_table['rows']
+
+    # The sample worker held all the sample rows, while a sweep worker holds
+    # the raw results of a single (a, t_b) iteration, before sending them to the parent
+    iteration_results_size = len(search_space['m']) * num_material_points * raw_row_size
+    sample_results_size = len(sample_rows) * raw_row_size
+
+    time_per_point = float(np.mean(timings))
+    compute_time = time_per_point * num_points / workers
+    estimate = dict(
+        num_points=num_points,
+        workers=workers,
+        time_per_point=time_per_point,
+        cpu_time=time_per_point * num_points,
+        compute_time=compute_time,
+        write_time=write_time,
+        index_time=index_time,
+        # The parent writes the results while the workers compute them, but creates the indexes afterwards
+        wall_time=max(compute_time, write_time) + index_time,
+        uncompressed_size=uncompressed_size,
+        compression_ratio=compression_ratio,
+        results_size=uncompressed_size / compression_ratio,
+        peak_memory_per_worker=worker_peak_memory + max(iteration_results_size - sample_results_size, 0),
+    )
+
+    logger.info("%d (a, t_b, m) points, %.3f millisecond(s) per point (+/- %.3f)", num_points, 1000.0 * time_per_point, 1000.0 * np.std(timings))
+    logger.info("Projected wall time with %d worker(s): %s (%s of CPU time, %s of serial writes, %s of serial index creation)", workers,
+                format_duration(estimate['wall_time']), format_duration(estimate['cpu_time']), format_duration(write_time), format_duration(index_time))
+    logger.info("The projected wall time is a lower bound, as it assumes the workers scale perfectly, "
+                "i.e. without contending for the memory bandwidth and the BLAS threads (see OMP_NUM_THREADS)")
+    logger.info("Projected results file size: %.2f MB (%.2f MB uncompressed, %.2fx compression ratio)", estimate['results_size'] / 1024.**2, uncompressed_size / 1024.**2, compression_ratio)
+    logger.info("Projected peak memory per worker: %.2f MB", estimate['peak_memory_per_worker'] / 1024.**2)
+
+    return estimate
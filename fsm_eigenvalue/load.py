@@ -1,3 +1,5 @@
+import copy
+
 from beam_integrals.beam_types import BaseBeamType
 import networkx as nx
 import numpy as np
@@ -7,6 +9,10 @@ import yaml
 from . import ASTIFF_BLOCK_SIZE
 
 
+MATERIAL_AXIS_PREFIX = 'materials.'
+SWEEPABLE_MATERIAL_PROPERTIES = 'E_x, E_y, mu_x, mu_y, G_xy'.split(', ')
+
+
 def parse_data_file(data_file):
     with open(data_file, 'r') as fp:
         return yaml.load(fp)
@@ -21,15 +27,42 @@ def linspace_with_step(start, stop, step, **kwargs):
     num_samples = np.round((stop - start) / step + 1)
     return np.linspace(start, stop, num_samples, **kwargs)
 
-def get_search_space_iterations(search_space):
-    def dynamic_dtype(key):
-        return int if key == 'm' else float # only 'mode' is int
+def get_search_space_dtype(key):
+    return int if key == 'm' else float # only 'mode' is int
 
+def get_search_space_iterations(search_space):
     return {
-        key: linspace_with_step(start, stop, step, dtype=dynamic_dtype(key))
+        key: linspace_with_step(start, stop, step, dtype=get_search_space_dtype(key))
         for key, (start, stop, step) in search_space.items()
     }
 
+def get_search_space_values(search_space):
+    # Explicitly listed values of each axis, instead of ``[start, stop, step]``
+    return {
+        key: np.asarray(values, dtype=get_search_space_dtype(key))
+        for key, values in search_space.items()
+    }
+
+def get_material_axes(search_space):
+    # Material property axes are named 'materials.<material_id>.<property>',
+    # sorted to keep the order of their results columns stable
+    material_axes = []
+    for key in sorted(search_space):
+        if key.startswith(MATERIAL_AXIS_PREFIX):
+            # Material ids may contain dots, while the property names never do
+            material_id, _, prop = key[len(MATERIAL_AXIS_PREFIX):].rpartition('.')
+            assert material_id and prop in SWEEPABLE_MATERIAL_PROPERTIES, \
+                "Invalid material property axis '%s', expected 'materials.<material_id>.<%s>'" % (
+                    key, '|'.join(SWEEPABLE_MATERIAL_PROPERTIES)
+                )
+            material_axes.append((key, material_id, prop))
+
+    return material_axes
+
+def check_material_axes(search_space, materials):
+    for key, material_id, _ in get_material_axes(search_space):
+        assert material_id in materials, "Unknown material '%s' in the '%s' axis" % (material_id, key)
+
 def get_transformation_matrix(dx, dz, b):
     sin_a = dz/b
     cos_a = dx/b
@@ -47,6 +80,47 @@ def get_transformation_matrix(dx, dz, b):
 
     return R
 
+def get_strip_edge_data(nodal_lines, strip_id, node1_id, node2_id, material_id):
+    (x1, z1), (x2, z2) = nodal_lines[node1_id], nodal_lines[node2_id]
+    dx = x2 - x1
+    dz = z2 - z1
+    b = np.sqrt(dx**2 + dz**2) # [mm] strip width
+
+    R = get_transformation_matrix(dx, dz, b) # global<->local coordinates transformation matrix
+
+    # Deduced from Fortran block 83:94
+    astiff_blocks = (node1_id-1, node2_id-1) # Python counts from 0
+    astiff_fill_indices = []
+    for row in xrange(2):
+        for col in xrange(2):
+            astiff_row_start = ASTIFF_BLOCK_SIZE * astiff_blocks[row]
+            astiff_row_end   = ASTIFF_BLOCK_SIZE + astiff_row_start
+            astiff_col_start = ASTIFF_BLOCK_SIZE * astiff_blocks[col]
+            astiff_col_end   = ASTIFF_BLOCK_SIZE + astiff_col_start
+            astiff_indices = (
+                slice(astiff_row_start, astiff_row_end),
+                slice(astiff_col_start, astiff_col_end)
+            )
+
+            segment_row_start = ASTIFF_BLOCK_SIZE * row
+            segment_row_end   = ASTIFF_BLOCK_SIZE + segment_row_start
+            segment_col_start = ASTIFF_BLOCK_SIZE * col
+            segment_col_end   = ASTIFF_BLOCK_SIZE + segment_col_start
+            segment_indices = (
+                slice(segment_row_start, segment_row_end),
+                slice(segment_col_start, segment_col_end)
+            )
+
+            astiff_fill_indices.append((astiff_indices, segment_indices))
+
+    label = "(%d)" % strip_id
+
+    edge_data_keys = 'material_id, b, R, astiff_fill_indices, label'.split(', ')
+    return dict(zip(
+        edge_data_keys,
+        (material_id, b, R, astiff_fill_indices, label)
+    ))
+
 def get_nodal_graph(geometry):
     # Mathematical graph of all nodal lines connected by finite strips
     nodal_graph = nx.DiGraph()
@@ -57,44 +131,9 @@ def get_nodal_graph(geometry):
 
     # Add finite strips
     for strip_id, (node1_id, node2_id, material_id) in enumerate(geometry['finite_strips'], start=1):
-        dx = nodal_graph.node[node2_id]['x'] - nodal_graph.node[node1_id]['x']
-        dz = nodal_graph.node[node2_id]['z'] - nodal_graph.node[node1_id]['z']
-        b = np.sqrt(dx**2 + dz**2) # [mm] strip width
-
-        R = get_transformation_matrix(dx, dz, b) # global<->local coordinates transformation matrix
-
-        # Deduced from Fortran block 83:94
-        astiff_blocks = (node1_id-1, node2_id-1) # Python counts from 0
-        astiff_fill_indices = []
-        for row in xrange(2):
-            for col in xrange(2):
-                astiff_row_start = ASTIFF_BLOCK_SIZE * astiff_blocks[row]
-                astiff_row_end   = ASTIFF_BLOCK_SIZE + astiff_row_start
-                astiff_col_start = ASTIFF_BLOCK_SIZE * astiff_blocks[col]
-                astiff_col_end   = ASTIFF_BLOCK_SIZE + astiff_col_start
-                astiff_indices = (
-                    slice(astiff_row_start, astiff_row_end),
-                    slice(astiff_col_start, astiff_col_end)
-                )
-
-                segment_row_start = ASTIFF_BLOCK_SIZE * row
-                segment_row_end   = ASTIFF_BLOCK_SIZE + segment_row_start
-                segment_col_start = ASTIFF_BLOCK_SIZE * col
-                segment_col_end   = ASTIFF_BLOCK_SIZE + segment_col_start
-                segment_indices = (
-                    slice(segment_row_start, segment_row_end),
-                    slice(segment_col_start, segment_col_end)
-                )
-
-                astiff_fill_indices.append((astiff_indices, segment_indices))
-
-        label = "(%d)" % strip_id
-
-        edge_data_keys = 'material_id, b, R, astiff_fill_indices, label'.split(', ')
-        nodal_graph.add_edge(node1_id, node2_id, dict(zip(
-            edge_data_keys,
-            (material_id, b, R, astiff_fill_indices, label)
-        )))
+        nodal_graph.add_edge(node1_id, node2_id, get_strip_edge_data(
+            geometry['nodal_lines'], strip_id, node1_id, node2_id, material_id
+        ))
 
     # Disallow further changes to the nodal_graph
     nx.freeze(nodal_graph)
@@ -104,6 +143,13 @@ def get_nodal_graph(geometry):
 
     return nodal_graph, strip_data
 
+def get_strip_data(geometry):
+    # Same traversal through strips as ``get_nodal_graph``, without building the graph
+    return [
+        (node1_id, node2_id, get_strip_edge_data(geometry['nodal_lines'], strip_id, node1_id, node2_id, material_id))
+        for strip_id, (node1_id, node2_id, material_id) in enumerate(geometry['finite_strips'], start=1)
+    ]
+
 def precompute_material_properties(materials):
     for material in materials.values():
         material['ro'] /= 10**9 # convert mass density from [kg/m**3] to [kg/mm**3] before calc
@@ -111,23 +157,63 @@ def precompute_material_properties(materials):
         # Mass matrix needs mass density normalized to 1 [m] of length, even if everything is done in [mm]
         material['ro'] /= 10**3
 
-        data_keys = 'E_x, E_y, mu_x, mu_y, G_xy'.split(', ')
-        E_x , E_y, mu_x, mu_y, G_xy = (material[k] for k in data_keys)
-
-        # As per eq. 2.20 from [Milasinovic1997]
-        mu_xy = 1. - mu_x*mu_y
-        material['K_x']  = E_x / mu_xy
-        material['K_y']  = E_y / mu_xy
-        material['K_1']  = mu_x * material['K_y']
-        material['K_xy'] = G_xy
+        material.update(get_stiffness_coefficients(
+            *(material[k] for k in SWEEPABLE_MATERIAL_PROPERTIES)
+        ))
 
     return materials
 
+def get_stiffness_coefficients(E_x, E_y, mu_x, mu_y, G_xy):
+    # As per eq. 2.20 from [Milasinovic1997]
+    mu_xy = 1. - mu_x*mu_y
+    K_y = E_y / mu_xy
+    return dict(
+        K_x=E_x / mu_xy,
+        K_y=K_y,
+        K_1=mu_x * K_y,
+        K_xy=G_xy,
+    )
+
+def get_swept_materials(materials, material_axes, material_values):
+    # Shallow copies of the precomputed materials, with the swept properties
+    # and the stiffness coefficients derived from them replaced
+    swept_materials = {
+        material_id: dict(material)
+        for material_id, material in materials.items()
+    }
+    for (_, material_id, prop), value in zip(material_axes, material_values):
+        swept_materials[material_id][prop] = value
+
+    for material_id in set(material_id for _, material_id, _ in material_axes):
+        material = swept_materials[material_id]
+        material.update(get_stiffness_coefficients(
+            *(material[k] for k in SWEEPABLE_MATERIAL_PROPERTIES)
+        ))
+
+    return swept_materials
+
 def get_astiff_shape(nodal_graph):
     astiff_size = ASTIFF_BLOCK_SIZE * nodal_graph.number_of_nodes()
     astiff_shape = (astiff_size, astiff_size)
     return astiff_shape
 
+def load_model_from(geometry, materials, search_space):
+    # In-memory alternative to ``load_data_from``, skipping the data file and the nodal graph.
+    # ``search_space`` axes are explicitly listed values, see ``get_search_space_values``.
+    search_space = get_search_space_values(search_space)
+    strip_data = get_strip_data(geometry)
+    materials = precompute_material_properties(copy.deepcopy(materials))
+    check_material_axes(search_space, materials)
+    astiff_size = ASTIFF_BLOCK_SIZE * len(geometry['nodal_lines'])
+    astiff_shape = (astiff_size, astiff_size)
+
+    return (
+        search_space,
+        strip_data,
+        materials,
+        astiff_shape,
+    )
+
 def load_data_from(data_file):
     input_data = parse_data_file(data_file)
 
@@ -135,6 +221,7 @@ def load_data_from(data_file):
     search_space = get_search_space_iterations(input_data['search_space'])
     nodal_graph, strip_data = get_nodal_graph(input_data['geometry'])
     materials = precompute_material_properties(input_data['materials'])
+    check_material_axes(search_space, materials)
     astiff_shape = get_astiff_shape(nodal_graph)
 
     return (
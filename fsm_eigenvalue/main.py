@@ -1,11 +1,87 @@
-from . import DEFAULT_PAGINATE_BY
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from . import DEFAULT_BACKEND, DEFAULT_COMPLEVEL, DEFAULT_COMPLIB, DEFAULT_PAGINATE_BY, DEFAULT_STORE_BACKEND
 from .compute import parameter_sweep
-from .load import load_data_from
-from .store import store_results_to
+from .compute.result_cache import get_result_cache_key, prune_result_cache, update_result_cache, RESULT_CACHE_MAX_SIZE
+from .estimate import DEFAULT_ESTIMATE_SAMPLE_SIZE, estimate_costs
+from .load import get_material_axes, load_data_from
+from .store import benchmark_codecs
+from .store_backends import get_store_backend
+
+
+logger = logging.getLogger(__name__)
+
+
+def do_everything(data_file, results_file, purge_integral_db_cache=False, paginate_by=DEFAULT_PAGINATE_BY,
+                  complib=DEFAULT_COMPLIB, complevel=DEFAULT_COMPLEVEL, bitshuffle=False, fletcher32=True, chunkshape=None,
+                  use_result_cache=False, backend=DEFAULT_BACKEND, workers=None, store_backend=DEFAULT_STORE_BACKEND,
+                  result_cache_max_size=RESULT_CACHE_MAX_SIZE):
+    beam_type_id, search_space, _, strip_data, materials, astiff_shape = load_data_from(data_file)
+
+    if use_result_cache and get_material_axes(search_space):
+        logger.warn('The result cache is not supported with material property axes, ignoring it...')
+        use_result_cache = False
+
+    if use_result_cache and store_backend != 'hdf5':
+        logger.warn("The result cache is supported only with the 'hdf5' store backend, ignoring it...")
+        use_result_cache = False
+
+    store_options = {}
+    if store_backend == 'hdf5':
+        store_options = dict(
+            complib=complib, complevel=complevel, bitshuffle=bitshuffle, fletcher32=fletcher32, chunkshape=chunkshape
+        )
+    store = get_store_backend(store_backend, results_file, data_file, search_space, astiff_shape, **store_options)
+    store.prepare()
+
+    with parameter_sweep(
+        beam_type_id, search_space, strip_data, materials, astiff_shape, purge_integral_db_cache, use_result_cache,
+        backend, workers, chunk_writer=store.get_chunk_writer()
+    ) as results_iterator:
+        store.store(results_iterator, paginate_by)
+
+    if use_result_cache:
+        cache_key = get_result_cache_key(beam_type_id, strip_data, materials, astiff_shape)
+        cache_filename = update_result_cache(
+            cache_key, results_file, search_space, astiff_shape, max_size=result_cache_max_size
+        )
+        if cache_filename:
+            prune_result_cache(max_size=result_cache_max_size, keep=cache_filename)
+
+def do_codec_benchmark(data_file, sample_size, purge_integral_db_cache=False, chunkshape=None, backend=DEFAULT_BACKEND, workers=None):
+    beam_type_id, search_space, _, strip_data, materials, astiff_shape = load_data_from(data_file)
+
+    # Sweep only through a random sample of strip lengths, keeping the rest of the search space intact
+    sample_size = min(sample_size, len(search_space['a']))
+    search_space['a'] = np.sort(np.random.choice(search_space['a'], sample_size, replace=False))
+
+    with parameter_sweep(beam_type_id, search_space, strip_data, materials, astiff_shape, purge_integral_db_cache, backend=backend, workers=workers) as results_iterator:
+        sample_results = list(results_iterator)
 
+    results_dir = tempfile.mkdtemp(prefix='fsm_eigenvalue-')
+    try:
+        return benchmark_codecs(results_dir, data_file, search_space, astiff_shape, sample_results, chunkshape=chunkshape)
+    finally:
+        shutil.rmtree(results_dir)
 
-def do_everything(data_file, results_file, purge_integral_db_cache=False, paginate_by=DEFAULT_PAGINATE_BY):
+def do_estimate(data_file, sample_size=DEFAULT_ESTIMATE_SAMPLE_SIZE, workers=None, purge_integral_db_cache=False,
+                backend=DEFAULT_BACKEND, complib=DEFAULT_COMPLIB, complevel=DEFAULT_COMPLEVEL, bitshuffle=False, fletcher32=True,
+                chunkshape=None):
     beam_type_id, search_space, _, strip_data, materials, astiff_shape = load_data_from(data_file)
 
-    with parameter_sweep(beam_type_id, search_space, strip_data, materials, astiff_shape, purge_integral_db_cache) as results_iterator:
-        store_results_to(results_file, data_file, search_space, astiff_shape, results_iterator, paginate_by)
+    results_dir = tempfile.mkdtemp(prefix='fsm_eigenvalue-')
+    try:
+        return estimate_costs(
+            os.path.join(results_dir, 'sample.hdf5'),
+            beam_type_id, search_space, strip_data, materials, astiff_shape,
+            sample_size=sample_size, workers=workers, backend=backend,
+            complib=complib, complevel=complevel, bitshuffle=bitshuffle, fletcher32=fletcher32, chunkshape=chunkshape,
+            purge_integral_db_cache=purge_integral_db_cache
+        )
+    finally:
+        shutil.rmtree(results_dir)
@@ -0,0 +1,195 @@
+import collections
+import logging
+import os
+import shutil
+
+import numpy as np
+import yaml
+
+from . import DEFAULT_COMPLEVEL, DEFAULT_COMPLIB, DEFAULT_PAGINATE_BY
+from .load import get_material_axes, get_search_space_iterations
+from .store import (
+    get_column_descriptions, get_column_units, get_generator_metadata, get_hdf5_table_description,
+    get_modal_composite_rows, log_progress, with_material_axes, write_results_file, BaseStoreBackend,
+    MODAL_COMPOSITES_TABLE_SPEC, RAW_RESULTS_TABLE_SPEC
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+NPY_DIR_METADATA_FILENAME = 'metadata.yaml'
+NPY_DIR_TABLE_NAMES = ['raw_results', 'modal_composites']
+
+
+def get_table_specs(search_space):
+    material_axes = get_material_axes(search_space)
+    return dict(
+        raw_results=with_material_axes(RAW_RESULTS_TABLE_SPEC, material_axes),
+        modal_composites=with_material_axes(MODAL_COMPOSITES_TABLE_SPEC, material_axes),
+    )
+
+def get_table_dtypes(search_space, astiff_shape):
+    return {
+        table_name: get_hdf5_table_description(table_spec, astiff_shape[0])
+        for table_name, table_spec in get_table_specs(search_space).items()
+    }
+
+def get_chunk_dirname(results_dir, table_name, a):
+    # ``repr`` keeps the full precision
+    return os.path.join(results_dir, table_name, "%r" % float(a))
+
+def get_chunk_column_filename(chunk_dirname, column_name):
+    return os.path.join(chunk_dirname, "%s.npy" % column_name)
+
+
+class NpyChunkWriter(object):
+    """
+    Picklable callable, run by each pool worker to store a whole ``t_b`` row
+    of the grid, for a single ``a``, as a memory-mappable ``.npy`` file per
+    column of each table.
+    """
+
+    def __init__(self, results_dir, table_dtypes, material_axes):
+        self.results_dir = results_dir
+        self.table_dtypes = table_dtypes
+        self.material_axes = material_axes
+
+    def __call__(self, a, iterations):
+        raw_results = []
+        modal_composites = []
+        for _, _, iteration_raw_results, iteration_modal_composites in iterations:
+            raw_results.extend(iteration_raw_results)
+            modal_composites.extend(get_modal_composite_rows(iteration_modal_composites, self.material_axes))
+
+        for table_name, rows in zip(NPY_DIR_TABLE_NAMES, [raw_results, modal_composites]):
+            table = np.array(rows, dtype=self.table_dtypes[table_name])
+            chunk_dirname = get_chunk_dirname(self.results_dir, table_name, a)
+
+            # Write to a temporary directory first, so that only complete chunks are ever visible
+            temp_dirname = chunk_dirname + '.tmp'
+            os.makedirs(temp_dirname)
+            for column_name in table.dtype.names:
+                np.save(get_chunk_column_filename(temp_dirname, column_name), table[column_name])
+            os.rename(temp_dirname, chunk_dirname)
+
+
+class NpyDirStoreBackend(BaseStoreBackend):
+    """
+    Columnar directory store, written by all the pool workers in parallel,
+    with a chunk per strip length and a ``.npy`` file per column. Uses the
+    same column specs, units and descriptions as the HDF5 results file, see
+    ``convert_npy_dir_to_hdf5``.
+    """
+
+    def prepare(self):
+        # Start from scratch, same as the truncated HDF5 results file, so that
+        # chunks of any previous run can't end up mixed with the current ones
+        logger.info("Creating the results directory '%s'...", self.results_file)
+        for table_name in NPY_DIR_TABLE_NAMES:
+            table_dir = os.path.join(self.results_file, table_name)
+            if os.path.exists(table_dir):
+                logger.warn("Removing the existing results directory '%s'...", table_dir)
+                shutil.rmtree(table_dir)
+            os.makedirs(table_dir)
+
+        # Write the metadata before any chunks, so that even partial results are self-describing
+        with open(self.data_file, 'r') as fp:
+            data_file_contents = fp.read()
+
+        metadata = get_generator_metadata()
+        metadata.update(
+            data_file=data_file_contents,
+            astiff_shape=list(self.astiff_shape),
+            tables={
+                table_name: dict(
+                    column_units=get_column_units(table_spec),
+                    column_descriptions=get_column_descriptions(table_spec),
+                )
+                for table_name, table_spec in get_table_specs(self.search_space).items()
+            },
+        )
+        with open(os.path.join(self.results_file, NPY_DIR_METADATA_FILENAME), 'w') as fp:
+            yaml.dump(metadata, fp, default_flow_style=False)
+
+    def get_chunk_writer(self):
+        return NpyChunkWriter(
+            self.results_file, get_table_dtypes(self.search_space, self.astiff_shape), get_material_axes(self.search_space)
+        )
+
+    def store(self, results_iterator, paginate_by=DEFAULT_PAGINATE_BY):
+        num_iterations = len(self.search_space['a']) * len(self.search_space['t_b'])
+
+        logger.info('Performing a multi-dimensional parameter sweep, with workers storing its results...')
+        for _ in log_progress(results_iterator, num_iterations, paginate_by):
+            pass
+
+
+def read_npy_dir_metadata(results_dir):
+    with open(os.path.join(results_dir, NPY_DIR_METADATA_FILENAME), 'r') as fp:
+        return yaml.load(fp)
+
+def get_npy_dir_strip_lengths(results_dir):
+    # Strip lengths of all the complete chunks, skipping the temporary ones
+    return sorted(
+        float(chunk_name)
+        for chunk_name in os.listdir(os.path.join(results_dir, NPY_DIR_TABLE_NAMES[0]))
+        if not chunk_name.endswith('.tmp')
+    )
+
+def select_search_space_strip_lengths(strip_lengths, search_space):
+    search_space_strip_lengths = set(float(a) for a in search_space['a'])
+    return [a for a in strip_lengths if a in search_space_strip_lengths]
+
+def read_npy_dir_chunk(results_dir, table_name, a, column_names, mmap_mode='r'):
+    chunk_dirname = get_chunk_dirname(results_dir, table_name, a)
+    return collections.OrderedDict(
+        (column_name, np.load(get_chunk_column_filename(chunk_dirname, column_name), mmap_mode=mmap_mode))
+        for column_name in column_names
+    )
+
+def iterate_npy_dir_chunks(results_dir, search_space, astiff_shape, strip_lengths, mmap_mode='r'):
+    # Reassembles the rows of each chunk, and splits them per ``(a, t_b)`` iteration
+    table_dtypes = get_table_dtypes(search_space, astiff_shape)
+
+    for a in strip_lengths:
+        tables = []
+        for table_name in NPY_DIR_TABLE_NAMES:
+            columns = read_npy_dir_chunk(results_dir, table_name, a, table_dtypes[table_name].names, mmap_mode)
+            table = np.empty(len(columns['a']), dtype=table_dtypes[table_name])
+            for column_name, column in columns.items():
+                table[column_name] = column
+
+            t_b = table['t_b']
+            tables.append(np.split(table, np.flatnonzero(t_b[1:] != t_b[:-1]) + 1))
+
+        for raw_results, modal_composites in zip(*tables):
+            yield a, raw_results['t_b'][0], raw_results, modal_composites
+
+def convert_npy_dir_to_hdf5(results_dir, results_file, paginate_by=DEFAULT_PAGINATE_BY,
+                            complib=DEFAULT_COMPLIB, complevel=DEFAULT_COMPLEVEL, bitshuffle=False, fletcher32=True, chunkshape=None):
+    metadata = read_npy_dir_metadata(results_dir)
+    search_space = get_search_space_iterations(yaml.load(metadata['data_file'])['search_space'])
+
+    all_strip_lengths = get_npy_dir_strip_lengths(results_dir)
+    strip_lengths = select_search_space_strip_lengths(all_strip_lengths, search_space)
+    if len(all_strip_lengths) > len(strip_lengths):
+        logger.warn("'%s' contains %d chunk(s) outside of its search space, ignoring them...", results_dir, len(all_strip_lengths) - len(strip_lengths))
+    if len(strip_lengths) < len(search_space['a']):
+        logger.warn("'%s' contains only %d out of %d chunks, converting them anyway...", results_dir, len(strip_lengths), len(search_space['a']))
+
+    # Same as yielded by ``parameter_sweep``, with a single modal composite unless there are material property axes
+    material_axes = get_material_axes(search_space)
+    results_iterator = (
+        (a, t_b, raw_results, modal_composites if material_axes else modal_composites[0].item())
+        for a, t_b, raw_results, modal_composites in iterate_npy_dir_chunks(
+            results_dir, search_space, metadata['astiff_shape'], strip_lengths
+        )
+    )
+
+    logger.info("Converting '%s' to '%s'...", results_dir, results_file)
+    write_results_file(
+        results_file, metadata['data_file'], search_space, metadata['astiff_shape'], results_iterator,
+        paginate_by,
+        complib=complib, complevel=complevel, bitshuffle=bitshuffle, fletcher32=fletcher32, chunkshape=chunkshape
+    )
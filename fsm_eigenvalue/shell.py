@@ -2,10 +2,77 @@ import argparse
 import logging
 import os
 
-from . import __version__, DEFAULT_PAGINATE_BY
-from .main import do_everything
+from . import __version__, DEFAULT_BACKEND, DEFAULT_COMPLEVEL, DEFAULT_COMPLIB, DEFAULT_PAGINATE_BY, DEFAULT_STORE_BACKEND
+from .compute.kernels import BACKEND_CHOICES
+from .compute.result_cache import (
+    get_result_cache_entries, prune_result_cache, purge_result_cache, RESULT_CACHE_MAX_SIZE
+)
+from .estimate import DEFAULT_ESTIMATE_SAMPLE_SIZE
+from .main import do_codec_benchmark, do_estimate, do_everything
+from .npy_store import convert_npy_dir_to_hdf5
+from .store import COMPLIB_CHOICES
+from .store_backends import STORE_BACKENDS
 
 
+RESULTS_FILE_EXTENSIONS = {
+    'hdf5': '.hdf5',
+    'npy-dir': '.npy-dir',
+}
+
+
+def add_hdf5_arguments(parser):
+    parser.add_argument(
+        '-c',
+        '--complib',
+        choices=COMPLIB_CHOICES,
+        default=DEFAULT_COMPLIB,
+        help="Compress results using the selected library, '%s' by default" % DEFAULT_COMPLIB
+    )
+    parser.add_argument(
+        '-l',
+        '--complevel',
+        metavar='LEVEL',
+        type=int,
+        choices=range(10),
+        default=DEFAULT_COMPLEVEL,
+        help="Compress results using the selected LEVEL (0-9), %d by default" % DEFAULT_COMPLEVEL
+    )
+    parser.add_argument(
+        '--bitshuffle',
+        action='store_true',
+        help='Use the Bitshuffle filter instead of Shuffle, available only with Blosc compressors'
+    )
+    parser.add_argument(
+        '--no-fletcher32',
+        action='store_false',
+        dest='fletcher32',
+        help="Don't add the Fletcher32 checksum to each results data chunk"
+    )
+    parser.add_argument(
+        '--chunkshape',
+        metavar='NUM',
+        type=int,
+        help='Store results in chunks of NUM rows, chosen automatically by default'
+    )
+
+def add_verbosity_arguments(parser):
+    parser.add_argument(
+        '-q',
+        '--quiet',
+        action='store_const',
+        const=logging.WARN,
+        dest='verbosity',
+        help='Be quiet, show only warnings and errors'
+    )
+    parser.add_argument(
+        '-v',
+        '--verbose',
+        action='store_const',
+        const=logging.DEBUG,
+        dest='verbosity',
+        help='Be very verbose, show debug information'
+    )
+
 def main():
     # Setup command line option parser
     parser = argparse.ArgumentParser(
@@ -22,7 +89,8 @@ def main():
         '-r',
         '--results-file',
         metavar='FILENAME',
-        help="Store results to the selected FILENAME, uses '<data_file>.hdf5' by default"
+        help="Store results to the selected FILENAME, uses '<data_file>.hdf5' "\
+             "(or '<data_file>.npy-dir', depending on the store backend) by default"
     )
     parser.add_argument(
         '-d',
@@ -39,21 +107,66 @@ def main():
         help="Show progress every NUM iterations, %d by default" % DEFAULT_PAGINATE_BY
     )
     parser.add_argument(
-        '-q',
-        '--quiet',
-        action='store_const',
-        const=logging.WARN,
-        dest='verbosity',
-        help='Be quiet, show only warnings and errors'
+        '-w',
+        '--workers',
+        metavar='NUM',
+        type=int,
+        help='Use NUM worker processes, uses all the available CPUs by default'
     )
     parser.add_argument(
-        '-v',
-        '--verbose',
-        action='store_const',
-        const=logging.DEBUG,
-        dest='verbosity',
-        help='Be very verbose, show debug information'
+        '-S',
+        '--store-backend',
+        choices=sorted(STORE_BACKENDS),
+        default=DEFAULT_STORE_BACKEND,
+        help="Store results using the selected backend, '%s' by default. "\
+             "The 'npy-dir' backend has all the workers write to a directory "\
+             "in parallel, see 'fsm_eigenvalue_convert'" % DEFAULT_STORE_BACKEND
+    )
+    parser.add_argument(
+        '-u',
+        '--use-result-cache',
+        action='store_true',
+        help='Reuse previously computed points from the result cache, and add new ones to it'
+    )
+    parser.add_argument(
+        '--result-cache-max-size',
+        metavar='MB',
+        type=int,
+        default=RESULT_CACHE_MAX_SIZE // 1024**2,
+        help="Limit the result cache to MB megabytes, %d by default. Results files larger "\
+             "than this aren't added to the result cache" % (RESULT_CACHE_MAX_SIZE // 1024**2)
+    )
+    parser.add_argument(
+        '-b',
+        '--backend',
+        choices=BACKEND_CHOICES,
+        default=DEFAULT_BACKEND,
+        help="Assemble the global matrices using the selected backend, '%s' by default" % DEFAULT_BACKEND
+    )
+    add_hdf5_arguments(parser)
+    parser.add_argument(
+        '--benchmark-codecs',
+        metavar='NUM',
+        type=int,
+        help="Don't store results, instead benchmark all the compression codecs, "\
+             "with and without Fletcher32, on a random sample of NUM strip lengths"
+    )
+    parser.add_argument(
+        '-e',
+        '--estimate',
+        action='store_true',
+        help="Don't store results, instead estimate the wall time, results file "\
+             "size and peak memory per worker of the whole parameter sweep"
     )
+    parser.add_argument(
+        '-s',
+        '--sample-size',
+        metavar='NUM',
+        type=int,
+        default=DEFAULT_ESTIMATE_SAMPLE_SIZE,
+        help="Estimate using a random sample of NUM (a, t_b, m) points, %d by default" % DEFAULT_ESTIMATE_SAMPLE_SIZE
+    )
+    add_verbosity_arguments(parser)
     parser.add_argument(
         '--version',
         action='version',
@@ -65,15 +178,153 @@ def main():
     log_level = args.verbosity or logging.INFO
     logging.basicConfig(level=log_level, format="%(asctime)s [%(levelname)s] %(message)s")
 
+    if args.bitshuffle and not args.complib.startswith('blosc'):
+        parser.error('--bitshuffle is available only with Blosc compressors')
+
+    if args.estimate:
+        do_estimate(
+            data_file=args.data_file,
+            sample_size=args.sample_size,
+            workers=args.workers,
+            purge_integral_db_cache=args.purge_integral_db_cache,
+            backend=args.backend,
+            complib=args.complib,
+            complevel=args.complevel,
+            bitshuffle=args.bitshuffle,
+            fletcher32=args.fletcher32,
+            chunkshape=args.chunkshape,
+        )
+        return
+
+    if args.benchmark_codecs:
+        do_codec_benchmark(
+            data_file=args.data_file,
+            sample_size=args.benchmark_codecs,
+            purge_integral_db_cache=args.purge_integral_db_cache,
+            chunkshape=args.chunkshape,
+            backend=args.backend,
+            workers=args.workers,
+        )
+        return
+
     if not args.results_file:
-        args.results_file = os.path.splitext(args.data_file)[0] + '.hdf5'
+        args.results_file = os.path.splitext(args.data_file)[0] + RESULTS_FILE_EXTENSIONS[args.store_backend]
 
     do_everything(
         data_file=args.data_file,
         results_file=args.results_file,
         purge_integral_db_cache=args.purge_integral_db_cache,
         paginate_by=args.paginate_by,
+        complib=args.complib,
+        complevel=args.complevel,
+        bitshuffle=args.bitshuffle,
+        fletcher32=args.fletcher32,
+        chunkshape=args.chunkshape,
+        use_result_cache=args.use_result_cache,
+        result_cache_max_size=args.result_cache_max_size * 1024**2,
+        backend=args.backend,
+        workers=args.workers,
+        store_backend=args.store_backend,
+    )
+
+def convert_main():
+    # Setup command line option parser
+    parser = argparse.ArgumentParser(
+        description="Convert the 'npy-dir' results directory to the HDF5 results file."
+    )
+    parser.add_argument(
+        'results_dir',
+        help="Results directory written by 'fsm_eigenvalue --store-backend npy-dir'"
+    )
+    parser.add_argument(
+        '-r',
+        '--results-file',
+        metavar='FILENAME',
+        help="Store results to the selected FILENAME, uses '<results_dir>.hdf5' by default"
+    )
+    parser.add_argument(
+        '-p',
+        '--paginate-by',
+        metavar='NUM',
+        type=int,
+        default=DEFAULT_PAGINATE_BY,
+        help="Show progress every NUM iterations, %d by default" % DEFAULT_PAGINATE_BY
+    )
+    add_hdf5_arguments(parser)
+    add_verbosity_arguments(parser)
+    parser.add_argument(
+        '--version',
+        action='version',
+        version="%(prog)s " + __version__
+    )
+    args = parser.parse_args()
+
+    # Configure logging
+    log_level = args.verbosity or logging.INFO
+    logging.basicConfig(level=log_level, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if args.bitshuffle and not args.complib.startswith('blosc'):
+        parser.error('--bitshuffle is available only with Blosc compressors')
+
+    if not args.results_file:
+        args.results_file = os.path.splitext(args.results_dir.rstrip(os.sep))[0] + '.hdf5'
+
+    convert_npy_dir_to_hdf5(
+        results_dir=args.results_dir,
+        results_file=args.results_file,
+        paginate_by=args.paginate_by,
+        complib=args.complib,
+        complevel=args.complevel,
+        bitshuffle=args.bitshuffle,
+        fletcher32=args.fletcher32,
+        chunkshape=args.chunkshape,
+    )
+
+def cache_main():
+    # Setup command line option parser
+    parser = argparse.ArgumentParser(
+        description='Inspect or prune the fsm_eigenvalue result cache.'
     )
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser(
+        'info',
+        help='List the result cache entries, least recently used first'
+    )
+    prune_parser = subparsers.add_parser(
+        'prune',
+        help='Evict the least recently used result cache entries'
+    )
+    prune_parser.add_argument(
+        '-s',
+        '--max-size',
+        metavar='MB',
+        type=int,
+        default=RESULT_CACHE_MAX_SIZE // 1024**2,
+        help="Evict until the result cache fits into MB megabytes, %d by default" % (RESULT_CACHE_MAX_SIZE // 1024**2)
+    )
+    subparsers.add_parser(
+        'purge',
+        help='Remove all the result cache entries'
+    )
+    parser.add_argument(
+        '--version',
+        action='version',
+        version="%(prog)s " + __version__
+    )
+    args = parser.parse_args()
+
+    # Configure logging
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if args.command == 'prune':
+        prune_result_cache(max_size=args.max_size * 1024**2)
+    elif args.command == 'purge':
+        purge_result_cache()
+
+    entries = get_result_cache_entries()
+    for entry in entries:
+        print("%(cache_key)s %(size)14d B %(num_rows)12d rows, last used at %(last_used_at)s" % entry)
+    print("%d entries, %d B in total" % (len(entries), sum(entry['size'] for entry in entries)))
 
 if __name__ == '__main__':
     main()
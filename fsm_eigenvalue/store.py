@@ -1,6 +1,8 @@
 from contextlib import contextmanager
 from datetime import datetime
+import itertools
 import logging
+import os
 from timeit import default_timer as timer
 
 import numpy as np
@@ -8,7 +10,8 @@ import tables as tb
 from tzlocal import get_localzone
 import yaml
 
-from . import __version__, DEFAULT_PAGINATE_BY
+from . import __version__, DEFAULT_COMPLEVEL, DEFAULT_COMPLIB, DEFAULT_PAGINATE_BY
+from .load import get_material_axes
 
 
 logger = logging.getLogger(__name__)
@@ -46,6 +49,28 @@ MODAL_COMPOSITES_TABLE_SPEC = [
     ('sigma_cr_rel_err', np.float64, '',      'critical buckling stress relative approximation error'),
 ]
 
+MATERIAL_PROPERTY_SPECS = {
+    # property: (dtype,      unit,      description)
+    'E_x':      (np.float64, 'N/mm**2', 'elastic modulus in x direction'),
+    'E_y':      (np.float64, 'N/mm**2', 'elastic modulus in y direction'),
+    'mu_x':     (np.float64, '',        "Poisson's ratio in x direction"),
+    'mu_y':     (np.float64, '',        "Poisson's ratio in y direction"),
+    'G_xy':     (np.float64, 'N/mm**2', 'shear modulus'),
+}
+
+COMPLIB_CHOICES = ['zlib', 'blosc:lz4', 'blosc:zstd', 'none']
+
+BENCHMARK_CODECS = [
+    # complib,     complevel, bitshuffle
+    ('none',       0,         False),
+    ('zlib',       1,         False),
+    ('blosc:lz4',  5,         False),
+    ('blosc:lz4',  5,         True),
+    ('blosc:zstd', 5,         False),
+    ('blosc:zstd', 5,         True),
+]
+BENCHMARK_FLETCHER32 = [False, True]
+
 
 def get_hdf5_table_description(table_spec, vector_shape):
     return np.dtype([
@@ -53,6 +78,24 @@ def get_hdf5_table_description(table_spec, vector_shape):
         for column_name, dtype, _, _ in table_spec
     ])
 
+def get_material_column_name(material_id, prop):
+    return "%s_%s" % (material_id, prop)
+
+def with_material_axes(table_spec, material_axes):
+    # Material property columns follow ``a, t_b``, as per ``compute.core.add_material_values``
+    material_columns = []
+    for _, material_id, prop in material_axes:
+        dtype, unit, description = MATERIAL_PROPERTY_SPECS[prop]
+        material_columns.append(
+            (get_material_column_name(material_id, prop), dtype, unit, "%s %s" % (material_id, description))
+        )
+
+    return table_spec[:2] + material_columns + table_spec[2:]
+
+def get_modal_composite_rows(modal_composites, material_axes):
+    # Without material property axes there's only a single modal composite per ``(a, t_b)``
+    return modal_composites if material_axes else [modal_composites]
+
 def get_column_units(table_spec):
     return {
         column_name: unit
@@ -66,10 +109,15 @@ def get_column_descriptions(table_spec):
     }
 
 @contextmanager
-def create_table(file, group, name, table_spec, vector_shape, expectedrows, indexes=None):
-    # Use `expectedrows` to help PyTables determine the optimal chunk size
+def create_table(file, group, name, table_spec, vector_shape, expectedrows, indexes=None, chunkshape=None):
+    # Use `expectedrows` to help PyTables determine the optimal chunk size,
+    # unless the `chunkshape` (number of rows per chunk) has been explicitly set
     table_description = get_hdf5_table_description(table_spec, vector_shape)
-    table = file.create_table(group, name, table_description, expectedrows=expectedrows)
+    table = file.create_table(
+        group, name, table_description,
+        expectedrows=expectedrows,
+        chunkshape=(chunkshape,) if chunkshape else None
+    )
 
     # Add table metadata
     table.attrs.column_units_as_yaml = yaml.dump(
@@ -87,25 +135,46 @@ def create_table(file, group, name, table_spec, vector_shape, expectedrows, inde
     table.flush()
 
     if indexes:
-        logger.info("Creating a completely sorted index (CSI) on %s columns to speed up '%s' table lookups... ", indexes, name)
-        start = timer()
-        for col in indexes:
-            table.cols._f_col(col).create_csindex()
-        logger.info("Index creation completed in %f second(s)", timer() - start)
+        create_csindexes(table, indexes)
 
     table.close()
 
-def store_results_to(results_file, data_file, search_space, astiff_shape, results_iterator, paginate_by=DEFAULT_PAGINATE_BY):
+def create_csindexes(table, indexes):
+    logger.info("Creating a completely sorted index (CSI) on %s columns to speed up '%s' table lookups... ", indexes, table.name)
+    start = timer()
+    for col in indexes:
+        table.cols._f_col(col).create_csindex()
+    logger.info("Index creation completed in %f second(s)", timer() - start)
+
+def get_results_indexes(search_space):
+    material_axes = get_material_axes(search_space)
+    material_columns = [get_material_column_name(material_id, prop) for _, material_id, prop in material_axes]
+    return dict(
+        raw_results=['a', 't_b'] + material_columns + ['m'],
+        modal_composites=['a', 't_b'] + material_columns,
+    )
+
+def index_results_file(results_file, search_space):
+    with tb.open_file(results_file, 'a') as f:
+        for table_name, indexes in get_results_indexes(search_space).items():
+            create_csindexes(f.root.parameter_sweep._f_get_child(table_name), indexes)
+
+def get_filters(complib=DEFAULT_COMPLIB, complevel=DEFAULT_COMPLEVEL, bitshuffle=False, fletcher32=True):
     # These filters will be applied to all the datasets created immediately under the root group:
     #   * 'complib': Specifies the compression library to be used. Although PyTables
     #     supports many interesting compression libraries, HDF5 itself provides
     #     only 2 pre-defined filters for compression: ZLIB and SZIP. We can't
     #     use SZIP due to licensing issues, therefore ZLIB has been chosen by default as
     #     it's supported by all major HDF5 viewers (HDFView, HDF Compass, ViTables,
-    #     HDF Explorer).
+    #     HDF Explorer). Blosc based compressors (LZ4, Zstd) are much faster, but
+    #     the resulting files are readable only by HDF5 viewers with the Blosc
+    #     filter plugin installed. Use 'none' to disable compression altogether.
     #   * 'complevel': Specifies a compression level for data. Using the lowest
     #     level (1) by default, per PyTables optimization recommendations (see references).
-    #   * 'shuffle': Enable the Shuffle filter to improve the compression ratio.
+    #   * 'shuffle': Enable the Shuffle filter to improve the compression ratio,
+    #     unless the Bitshuffle filter is requested instead.
+    #   * 'bitshuffle': Enable the Bitshuffle filter, provided by the Blosc
+    #     library, which often compresses floating point data better than Shuffle.
     #   * 'fletcher32': Enable the Fletcher32 filter to add a checksum on each
     #     data chunk.
     #
@@ -116,48 +185,229 @@ def store_results_to(results_file, data_file, search_space, astiff_shape, result
     #   * http://www.pytables.org/usersguide/libref/helper_classes.html#the-filters-class
     #   * http://www.pytables.org/usersguide/optimization.html#compression-issues
     #   * http://www.pytables.org/usersguide/optimization.html#shuffling-or-how-to-make-the-compression-process-more-effective
-    filters = tb.Filters(complib='zlib', complevel=1, shuffle=True, fletcher32=True)
+    assert complib in COMPLIB_CHOICES
+    assert not bitshuffle or complib.startswith('blosc') # Bitshuffle is a Blosc filter
+
+    if complib == 'none':
+        return tb.Filters(complevel=0, shuffle=False, fletcher32=fletcher32)
 
+    return tb.Filters(
+        complib=complib,
+        complevel=complevel,
+        shuffle=not bitshuffle,
+        bitshuffle=bitshuffle,
+        fletcher32=fletcher32
+    )
+
+def get_generator_metadata():
+    return dict(
+        generator_name='fsm_eigenvalue',
+        generator_version=__version__,
+        created_at=datetime.now(get_localzone()).replace(microsecond=0).isoformat(),
+    )
+
+def log_progress(results_iterator, num_iterations, paginate_by=DEFAULT_PAGINATE_BY):
     start = timer()
+    num_iterations_digits = np.ceil(np.log10(num_iterations))
+    progress_fmt = "%6.2f%% (%{0}d/%{0}d iterations)".format(num_iterations_digits)
+    for index, results in enumerate(results_iterator, start=1):
+        yield results
+
+        if index % paginate_by == 0:
+            logger.info(progress_fmt, 100.0 * index / num_iterations, index, num_iterations)
+
+    elapsed = timer() - start
+    logger.info("Completed in %.2f second(s), %.3f millisecond(s) per iteration", elapsed, 1000.0 * elapsed/num_iterations)
+
+def store_results_to(results_file, data_file, search_space, astiff_shape, results_iterator, paginate_by=DEFAULT_PAGINATE_BY,
+                     complib=DEFAULT_COMPLIB, complevel=DEFAULT_COMPLEVEL, bitshuffle=False, fletcher32=True, chunkshape=None,
+                     create_indexes=True):
+    with open(data_file, 'r') as fp:
+        data_file_contents = fp.read()
+
+    write_results_file(
+        results_file, data_file_contents, search_space, astiff_shape, results_iterator, paginate_by,
+        complib=complib, complevel=complevel, bitshuffle=bitshuffle, fletcher32=fletcher32, chunkshape=chunkshape,
+        create_indexes=create_indexes
+    )
+
+def write_results_file(results_file, data_file_contents, search_space, astiff_shape, results_iterator, paginate_by=DEFAULT_PAGINATE_BY,
+                       complib=DEFAULT_COMPLIB, complevel=DEFAULT_COMPLEVEL, bitshuffle=False, fletcher32=True, chunkshape=None,
+                       create_indexes=True):
+    filters = get_filters(complib, complevel, bitshuffle, fletcher32)
+
     with tb.open_file(results_file, 'w', filters=filters) as out:
         # Add the root group metadata
-        out.root._v_attrs.generator_name = 'fsm_eigenvalue'
-        out.root._v_attrs.generator_version = __version__
-        out.root._v_attrs.created_at = datetime.now(get_localzone()).replace(
-            microsecond=0
-        ).isoformat()
+        for key, value in get_generator_metadata().items():
+            setattr(out.root._v_attrs, key, value)
 
         # Add data file contents
-        with open(data_file, 'r') as fp:
-            out.root._v_attrs.data_file = fp.read()
+        out.root._v_attrs.data_file = data_file_contents
 
         astiff_size = astiff_shape[0]
         num_iterations = len(search_space['a']) * len(search_space['t_b'])
 
+        material_axes = get_material_axes(search_space)
+        indexes = get_results_indexes(search_space) if create_indexes else {}
+        num_material_points = int(np.prod([len(search_space[key]) for key, _, _ in material_axes]))
+
         logger.info('Performing a multi-dimensional parameter sweep and storing its results...')
         parameter_sweep_group = out.create_group(out.root, 'parameter_sweep')
         with create_table(
             out, parameter_sweep_group, 'raw_results',
-            table_spec=RAW_RESULTS_TABLE_SPEC,
+            table_spec=with_material_axes(RAW_RESULTS_TABLE_SPEC, material_axes),
             vector_shape=astiff_size,
-            expectedrows=num_iterations * len(search_space['m']),
-            indexes=['a', 't_b', 'm']
+            expectedrows=num_iterations * num_material_points * len(search_space['m']),
+            indexes=indexes.get('raw_results'),
+            chunkshape=chunkshape
         ) as raw_results_table, \
         create_table(
             out, parameter_sweep_group, 'modal_composites',
-            table_spec=MODAL_COMPOSITES_TABLE_SPEC,
+            table_spec=with_material_axes(MODAL_COMPOSITES_TABLE_SPEC, material_axes),
             vector_shape=astiff_size,
-            expectedrows=num_iterations,
-            indexes=['a', 't_b']
+            expectedrows=num_iterations * num_material_points,
+            indexes=indexes.get('modal_composites'),
+            chunkshape=chunkshape
         ) as modal_composites_table:
-            num_iterations_digits = np.ceil(np.log10(num_iterations))
-            progress_fmt = "%6.2f%% (%{0}d/%{0}d iterations)".format(num_iterations_digits)
-            for index, (_, _, raw_results, modal_composite) in enumerate(results_iterator, start=1):
+            for _, _, raw_results, modal_composites in log_progress(results_iterator, num_iterations, paginate_by):
                 raw_results_table.append(raw_results) # Bulk insert
-                modal_composites_table.append([modal_composite])
+                modal_composites_table.append(get_modal_composite_rows(modal_composites, material_axes))
+
+class BaseStoreBackend(object):
+    """
+    Stores the results of a parameter sweep. Backends returning a chunk
+    writer from ``get_chunk_writer`` have each pool worker store its own
+    chunk, a whole ``t_b`` row of the grid for a single ``a``, while the
+    parent process only reports progress.
+    """
+
+    def __init__(self, results_file, data_file, search_space, astiff_shape):
+        self.results_file = results_file
+        self.data_file = data_file
+        self.search_space = search_space
+        self.astiff_shape = astiff_shape
+
+    def prepare(self):
+        # Called by the parent process before the parameter sweep starts
+        pass
+
+    def get_chunk_writer(self):
+        return None
+
+    def store(self, results_iterator, paginate_by=DEFAULT_PAGINATE_BY):
+        raise NotImplementedError
+
+
+class HDF5StoreBackend(BaseStoreBackend):
+    """
+    Single HDF5 results file, written by the parent process.
+    """
+
+    def __init__(self, results_file, data_file, search_space, astiff_shape,
+                 complib=DEFAULT_COMPLIB, complevel=DEFAULT_COMPLEVEL, bitshuffle=False, fletcher32=True, chunkshape=None):
+        super(HDF5StoreBackend, self).__init__(results_file, data_file, search_space, astiff_shape)
+        self.hdf5_options = dict(
+            complib=complib, complevel=complevel, bitshuffle=bitshuffle, fletcher32=fletcher32, chunkshape=chunkshape
+        )
+
+    def store(self, results_iterator, paginate_by=DEFAULT_PAGINATE_BY):
+        store_results_to(
+            self.results_file, self.data_file, self.search_space, self.astiff_shape, results_iterator, paginate_by,
+            **self.hdf5_options
+        )
+
+
+def read_results_from(results_file):
+    with tb.open_file(results_file, 'r') as f:
+        raw_results = f.root.parameter_sweep.raw_results.read()
+        modal_composites = f.root.parameter_sweep.modal_composites.read()
+
+    return raw_results, modal_composites
+
+def get_results_size(results_file):
+    with tb.open_file(results_file, 'r') as f:
+        tables = [f.root.parameter_sweep.raw_results, f.root.parameter_sweep.modal_composites]
+        size_in_memory = sum(table.size_in_memory for table in tables)
+        size_on_disk = sum(table.size_on_disk for table in tables)
+
+    return size_in_memory, size_on_disk
+
+def get_table_chunk_rows(table_spec, vector_shape, expectedrows, chunkshape=None):
+    # Number of rows per chunk, as picked by ``create_table``
+    if chunkshape:
+        return chunkshape
+
+    with tb.open_file('chunk_rows.hdf5', 'w', driver='H5FD_CORE', driver_core_backing_store=0) as f:
+        table = f.create_table(f.root, 'sample', get_hdf5_table_description(table_spec, vector_shape), expectedrows=expectedrows)
+        return table.chunkshape[0]
+
+def measure_sample_table(results_file, table_spec, vector_shape, rows, expectedrows, indexes,
+                         complib=DEFAULT_COMPLIB, complevel=DEFAULT_COMPLEVEL, bitshuffle=False, fletcher32=True, chunkshape=None):
+    # Write the sample rows with the chunk size of the whole table, keeping only
+    # the full chunks, as a partially filled chunk skews the compression ratio
+    chunk_rows = get_table_chunk_rows(table_spec, vector_shape, expectedrows, chunkshape)
+    rows = rows[:len(rows) // chunk_rows * chunk_rows]
+    assert rows, "The sample doesn't fill a single chunk of %d rows" % chunk_rows
+
+    filters = get_filters(complib, complevel, bitshuffle, fletcher32)
+    with tb.open_file(results_file, 'w', filters=filters) as out:
+        start = timer()
+        with create_table(out, out.root, 'sample', table_spec, vector_shape, expectedrows, chunkshape=chunkshape) as table:
+            table.append(rows)
+        write_time = timer() - start
+
+    with tb.open_file(results_file, 'a') as f:
+        table = f.root.sample
+        compression_ratio = float(table.size_in_memory) / table.size_on_disk
+
+        start = timer()
+        create_csindexes(table, indexes)
+        index_time = timer() - start
+
+    return dict(rows=len(rows), write_time=write_time, index_time=index_time, compression_ratio=compression_ratio)
+
+def benchmark_codecs(results_dir, data_file, search_space, astiff_shape, sample_results, codecs=BENCHMARK_CODECS,
+                     fletcher32_choices=BENCHMARK_FLETCHER32, chunkshape=None):
+    logger.info('Benchmarking compression codecs on a sample of %d iterations...', len(sample_results))
+
+    benchmark_results = []
+    for (complib, complevel, bitshuffle), fletcher32 in itertools.product(codecs, fletcher32_choices):
+        codec_name = "%s:%d%s%s" % (complib, complevel, '+bitshuffle' if bitshuffle else '', '+fletcher32' if fletcher32 else '')
+        results_file = os.path.join(results_dir, "%s.hdf5" % codec_name.replace(':', '-'))
+
+        # Time the index creation separately, as it doesn't depend on the codec
+        start = timer()
+        store_results_to(
+            results_file, data_file, search_space, astiff_shape, iter(sample_results),
+            paginate_by=len(sample_results)+1, # Don't report progress
+            complib=complib, complevel=complevel, bitshuffle=bitshuffle, fletcher32=fletcher32, chunkshape=chunkshape,
+            create_indexes=False
+        )
+        write_time = timer() - start
+
+        start = timer()
+        index_results_file(results_file, search_space)
+        index_time = timer() - start
+
+        start = timer()
+        read_results_from(results_file)
+        read_time = timer() - start
+
+        size_in_memory, size_on_disk = get_results_size(results_file)
+        megabytes = size_in_memory / 1024.**2
+        benchmark_results.append(dict(
+            codec=codec_name,
+            write_throughput=megabytes / write_time,
+            read_throughput=megabytes / read_time,
+            index_time=index_time,
+            compression_ratio=float(size_in_memory) / size_on_disk,
+        ))
 
-                if index % paginate_by == 0:
-                    logger.info(progress_fmt, 100.0 * index / num_iterations, index, num_iterations)
+    logger.info("%-36s %14s %14s %10s %12s", 'codec', 'write [MB/s]', 'read [MB/s]', 'index [s]', 'ratio')
+    for r in benchmark_results:
+        logger.info(
+            "%-36s %14.2f %14.2f %10.3f %12.2f",
+            r['codec'], r['write_throughput'], r['read_throughput'], r['index_time'], r['compression_ratio']
+        )
 
-            elapsed = timer() - start
-            logger.info("Completed in %.2f second(s), %.3f millisecond(s) per iteration", elapsed, 1000.0 * elapsed/num_iterations)
+    return benchmark_results
@@ -0,0 +1,13 @@
+from .npy_store import NpyDirStoreBackend
+from .store import HDF5StoreBackend
+
+
+STORE_BACKENDS = {
+    'hdf5': HDF5StoreBackend,
+    'npy-dir': NpyDirStoreBackend,
+}
+
+
+def get_store_backend(store_backend, results_file, data_file, search_space, astiff_shape, **options):
+    assert store_backend in STORE_BACKENDS
+    return STORE_BACKENDS[store_backend](results_file, data_file, search_space, astiff_shape, **options)
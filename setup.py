@@ -26,9 +26,16 @@ setup(
         'Topic :: Scientific/Engineering :: Physics',
     ],
     platforms='any',
-    packages=find_packages(),
+    packages=find_packages(exclude=['tests']),
     entry_points={
-        'console_scripts': ['fsm_eigenvalue=fsm_eigenvalue.shell:main'],
+        'console_scripts': [
+            'fsm_eigenvalue=fsm_eigenvalue.shell:main',
+            'fsm_eigenvalue_cache=fsm_eigenvalue.shell:cache_main',
+            'fsm_eigenvalue_convert=fsm_eigenvalue.shell:convert_main',
+        ],
     },
     install_requires=open('requirements.txt').read().splitlines(),
+    extras_require={
+        'numba': ['numba'],
+    },
 )
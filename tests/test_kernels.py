@@ -0,0 +1,44 @@
+import os
+import unittest
+
+import numpy as np
+
+from fsm_eigenvalue.compute.kernels import (
+    check_backend_parity, njit, CompiledGlobalMatrices, BACKEND_PARITY_RTOL
+)
+from fsm_eigenvalue.compute.matrices import assemble_global_matrices
+from fsm_eigenvalue.load import load_data_from
+
+
+DATA_FILES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'examples', 'data-files')
+DATA_FILES = ['barbero-elastic.yaml', 'barbero-viscoelastic.yaml']
+
+
+@unittest.skipIf(njit is None, 'Numba is not installed')
+class CompiledGlobalMatricesTest(unittest.TestCase):
+    def assert_parity(self, data_file, stiffness_integrals, a_mu, t_b):
+        _, _, _, strip_data, materials, astiff_shape = load_data_from(os.path.join(DATA_FILES_DIR, data_file))
+        compiled = CompiledGlobalMatrices(strip_data, materials, astiff_shape)
+
+        expected = assemble_global_matrices(stiffness_integrals, a_mu, strip_data, materials, astiff_shape, t_b)
+        actual = compiled.assemble(stiffness_integrals, a_mu, t_b)
+        for name, X_expected, X_actual in zip(['K_hat', 'K_sigma', 'M'], expected, actual):
+            atol = BACKEND_PARITY_RTOL * np.abs(X_expected).max()
+            np.testing.assert_allclose(X_actual, X_expected, rtol=BACKEND_PARITY_RTOL, atol=atol, err_msg=name)
+
+    def test_example_data_files(self):
+        for data_file in DATA_FILES:
+            for a_mu, t_b in [(0.01, 1.), (30., 2.), (123.4, 5.6)]:
+                self.assert_parity(data_file, tuple(np.linspace(0.5, 1.5, 11)), a_mu, t_b)
+
+    def test_check_backend_parity(self):
+        for data_file in DATA_FILES:
+            _, _, _, strip_data, materials, astiff_shape = load_data_from(os.path.join(DATA_FILES_DIR, data_file))
+            compiled = CompiledGlobalMatrices(strip_data, materials, astiff_shape)
+
+            # Must not raise on the rounding noise of the inclined strips
+            check_backend_parity(compiled, strip_data, materials, astiff_shape)
+
+
+if __name__ == '__main__':
+    unittest.main()
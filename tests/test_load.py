@@ -0,0 +1,33 @@
+import unittest
+
+from fsm_eigenvalue.load import check_material_axes, get_material_axes, SWEEPABLE_MATERIAL_PROPERTIES
+from fsm_eigenvalue.store import MATERIAL_PROPERTY_SPECS
+
+
+class MaterialAxesTest(unittest.TestCase):
+    def test_material_axes(self):
+        search_space = {
+            'a': None,
+            'materials.web.E_x': None,
+            'materials.flange.v1.2.G_xy': None,
+        }
+        self.assertEqual(get_material_axes(search_space), [
+            ('materials.flange.v1.2.G_xy', 'flange.v1.2', 'G_xy'),
+            ('materials.web.E_x', 'web', 'E_x'),
+        ])
+
+    def test_invalid_material_axes(self):
+        for key in ['materials.web.E_z', 'materials.web', 'materials.E_x', 'materials..E_x']:
+            with self.assertRaises(AssertionError):
+                get_material_axes({key: None})
+
+        with self.assertRaises(AssertionError):
+            check_material_axes({'materials.web.E_x': None}, {'flange': {}})
+
+    def test_material_property_specs(self):
+        # Every sweepable property needs its results column spec
+        self.assertEqual(sorted(MATERIAL_PROPERTY_SPECS), sorted(SWEEPABLE_MATERIAL_PROPERTIES))
+
+
+if __name__ == '__main__':
+    unittest.main()
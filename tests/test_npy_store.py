@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from fsm_eigenvalue.load import load_data_from
+from fsm_eigenvalue.npy_store import (
+    convert_npy_dir_to_hdf5, get_chunk_dirname, get_npy_dir_strip_lengths, NpyDirStoreBackend
+)
+from fsm_eigenvalue.store import read_results_from
+
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), os.pardir, 'examples', 'data-files', 'barbero-viscoelastic.yaml')
+
+
+def iterate_results(a, search_space, astiff_size):
+    for t_b in search_space['t_b']:
+        raw_results = [
+            (a, t_b, m, a + t_b, a, 0., m * t_b, t_b, 0.) + (np.full(astiff_size, m), np.full(astiff_size, t_b), np.zeros(astiff_size))
+            for m in [1, 2]
+        ]
+        modal_composite = raw_results[0][:-3]
+        yield a, t_b, raw_results, modal_composite
+
+
+class NpyDirStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix='fsm_eigenvalue-')
+        self.results_dir = os.path.join(self.temp_dir, 'results')
+        _, self.search_space, _, _, _, self.astiff_shape = load_data_from(DATA_FILE)
+        self.store = NpyDirStoreBackend(self.results_dir, DATA_FILE, self.search_space, self.astiff_shape)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_chunks(self, strip_lengths):
+        self.store.prepare()
+        chunk_writer = self.store.get_chunk_writer()
+        for a in strip_lengths:
+            chunk_writer(a, list(iterate_results(a, self.search_space, self.astiff_shape[0])))
+
+    def test_columnar_chunks(self):
+        a = self.search_space['a'][0]
+        self.write_chunks([a])
+
+        # A single chunk per strip length, with a ``.npy`` file per column
+        raw_results_dir = get_chunk_dirname(self.results_dir, 'raw_results', a)
+        self.assertIn('t_b.npy', os.listdir(raw_results_dir))
+        self.assertIn('Phi_omega.npy', os.listdir(raw_results_dir))
+        t_b = np.load(os.path.join(raw_results_dir, 't_b.npy'))
+        self.assertEqual(len(t_b), 2 * len(self.search_space['t_b']))
+
+    def test_prepare_removes_previous_chunks(self):
+        self.write_chunks(self.search_space['a'][:2])
+        self.write_chunks(self.search_space['a'][2:3])
+
+        self.assertEqual(get_npy_dir_strip_lengths(self.results_dir), [float(self.search_space['a'][2])])
+
+    def test_convert(self):
+        strip_lengths = self.search_space['a'][:2]
+        self.write_chunks(strip_lengths)
+
+        results_file = os.path.join(self.temp_dir, 'results.hdf5')
+        convert_npy_dir_to_hdf5(self.results_dir, results_file)
+        raw_results, modal_composites = read_results_from(results_file)
+
+        expected = [
+            iteration
+            for a in strip_lengths
+            for iteration in iterate_results(a, self.search_space, self.astiff_shape[0])
+        ]
+        self.assertEqual(len(raw_results), 2 * len(expected))
+        self.assertEqual(len(modal_composites), len(expected))
+
+        np.testing.assert_array_equal(modal_composites['t_b'], [t_b for _, t_b, _, _ in expected])
+        np.testing.assert_array_equal(raw_results['sigma_cr'], [
+            raw_result[6] for _, _, iteration_raw_results, _ in expected for raw_result in iteration_raw_results
+        ])
+        np.testing.assert_array_equal(raw_results['Phi_omega'][1], np.full(self.astiff_shape[0], 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from fsm_eigenvalue.compute import result_cache
+from fsm_eigenvalue.compute.result_cache import (
+    get_result_cache_entries, get_result_cache_filename, get_result_cache_key, lookup_cached_results,
+    open_result_cache, prune_result_cache, update_result_cache
+)
+from fsm_eigenvalue.store import write_results_file
+
+
+ASTIFF_SIZE = 4
+
+
+def get_search_space(a):
+    return dict(a=np.array(a, dtype=np.float64), t_b=np.array([1., 2.]), m=np.array([1, 2], dtype=np.int32))
+
+def iterate_results(search_space, omega):
+    for a in search_space['a']:
+        for t_b in search_space['t_b']:
+            raw_results = [
+                (a, t_b, m, omega, omega, 0., 1., 1., 0.) + (np.ones(ASTIFF_SIZE),) * 3
+                for m in search_space['m']
+            ]
+            modal_composite = (a, t_b, 1, omega, omega, 0., 1., 1., 0.)
+            yield a, t_b, raw_results, modal_composite
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix='fsm_eigenvalue-')
+        self.cache_dir = os.path.join(self.temp_dir, 'results')
+        self.original_cache_dir = result_cache.RESULT_CACHE_DIR
+        result_cache.RESULT_CACHE_DIR = self.cache_dir
+
+    def tearDown(self):
+        result_cache.RESULT_CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.temp_dir)
+
+    def update(self, cache_key, a, omega, **kwargs):
+        search_space = get_search_space(a)
+        results_file = os.path.join(self.temp_dir, "%s.hdf5" % cache_key)
+        write_results_file(
+            results_file, 'data file', search_space, (ASTIFF_SIZE, ASTIFF_SIZE), iterate_results(search_space, omega)
+        )
+        return update_result_cache(cache_key, results_file, search_space, (ASTIFF_SIZE, ASTIFF_SIZE), **kwargs)
+
+    def lookup(self, cache_key, a, t_b):
+        with open_result_cache(get_result_cache_filename(cache_key)) as f:
+            return lookup_cached_results(f, a, t_b)
+
+    def test_lookup(self):
+        self.update('model', [1000., 2000.], omega=10.)
+
+        cached_results = self.lookup('model', 1000. + 10**-9, 2.)
+        self.assertEqual(sorted(cached_results), [1, 2])
+        self.assertEqual(cached_results[2][:4], (1000. + 10**-9, 2., 2, 10.))
+        self.assertEqual(self.lookup('model', 3000., 2.), {})
+
+    def test_merge(self):
+        self.update('model', [1000., 2000.], omega=10.)
+        self.update('model', [2000., 3000.], omega=20.)
+
+        # Points of the latest run supersede the cached ones, the rest are kept
+        self.assertEqual(self.lookup('model', 1000., 1.)[1][3], 10.)
+        self.assertEqual(self.lookup('model', 2000., 1.)[1][3], 20.)
+        self.assertEqual(self.lookup('model', 3000., 1.)[1][3], 20.)
+        with open_result_cache(get_result_cache_filename('model')) as f:
+            self.assertEqual(f.root.raw_results.nrows, 3 * 2 * 2)
+
+        # No temporary files are left behind
+        self.assertEqual(os.listdir(self.cache_dir), ['model.hdf5'])
+
+    def test_skip_oversized(self):
+        self.assertIsNone(self.update('model', [1000.], omega=10., max_size=1))
+        self.assertEqual(get_result_cache_entries(), [])
+
+    def test_prune(self):
+        self.update('old', [1000.], omega=10.)
+        os.utime(get_result_cache_filename('old'), (0, 0)) # Least recently used
+        new_filename = self.update('new', [1000.], omega=10.)
+
+        # Evicts the least recently used entries, but never the one to keep
+        self.assertGreater(prune_result_cache(max_size=10**9, keep=new_filename), 0)
+        self.assertEqual(len(get_result_cache_entries()), 2)
+
+        total_size = prune_result_cache(max_size=1, keep=new_filename)
+        self.assertEqual([entry['filename'] for entry in get_result_cache_entries()], [new_filename])
+        self.assertEqual(total_size, os.path.getsize(new_filename))
+
+    def test_cache_key(self):
+        strip_data = [(1, 2, dict(material_id='steel', b=10., R=np.eye(2*ASTIFF_SIZE)))]
+        materials = dict(steel=dict(t_s=1., ro=7.85e-9, c=0., K_x=1., K_y=1., K_1=0.3, K_xy=0.35))
+        astiff_shape = (2*ASTIFF_SIZE, 2*ASTIFF_SIZE)
+
+        key = get_result_cache_key(1, strip_data, materials, astiff_shape)
+        self.assertNotEqual(get_result_cache_key(2, strip_data, materials, astiff_shape), key)
+
+        original_version = result_cache.__version__
+        try:
+            result_cache.__version__ = '0.0.0'
+            self.assertNotEqual(get_result_cache_key(1, strip_data, materials, astiff_shape), key)
+        finally:
+            result_cache.__version__ = original_version
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+from importlib import import_module
+import os
+import unittest
+
+import numpy as np
+import yaml
+
+from fsm_eigenvalue.compute.parameter_sweep import SweepEngine
+
+
+# Shadowed by the ``parameter_sweep`` function in ``fsm_eigenvalue.compute``
+parameter_sweep = import_module('fsm_eigenvalue.compute.parameter_sweep')
+
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), os.pardir, 'examples', 'data-files', 'barbero-viscoelastic.yaml')
+WORKERS = 2
+
+
+def perform_iteration(integral_db, beam_type, strip_data, materials, astiff_shape, a, t_b, m, *args):
+    # Synthetic results, as the integral database isn't needed to test the engine itself
+    sigma_cr = a * t_b / m
+    Phi = np.full(astiff_shape[0], m, dtype=np.float64)
+    return (a, t_b, m, 1., 1., 0., sigma_cr, sigma_cr, 0., Phi, Phi, np.zeros_like(Phi))
+
+
+class SweepEngineTest(unittest.TestCase):
+    def setUp(self):
+        with open(DATA_FILE, 'r') as fp:
+            input_data = yaml.load(fp)
+        self.geometry = input_data['geometry']
+        self.materials = input_data['materials']
+
+        # Patched before the worker pool is forked, so that the workers see them too
+        self.originals = dict(
+            check_for_integral_db=parameter_sweep.check_for_integral_db,
+            open_integral_db=parameter_sweep.open_integral_db,
+            perform_iteration=parameter_sweep.perform_iteration,
+        )
+        parameter_sweep.check_for_integral_db = lambda *args, **kwargs: None
+        parameter_sweep.open_integral_db = lambda *args, **kwargs: None
+        parameter_sweep.perform_iteration = perform_iteration
+
+        self.engine = SweepEngine(beam_type_id=1, workers=WORKERS)
+
+    def tearDown(self):
+        self.engine.close()
+        for name, value in self.originals.items():
+            setattr(parameter_sweep, name, value)
+
+    def run_engine(self, a):
+        return self.engine.run(self.geometry, self.materials, {'a': a, 't_b': [2., 3.], 'm': [1, 2, 3]})
+
+    def test_run(self):
+        results = self.run_engine([1000., 2000., 3000.])
+
+        self.assertEqual(len(results.raw_results), 3 * 2 * 3)
+        np.testing.assert_array_equal(results.modal_composites['a'], [1000., 1000., 2000., 2000., 3000., 3000.])
+        np.testing.assert_array_equal(results.modal_composites['m_dominant'], 3) # Minimal sigma_cr
+        np.testing.assert_array_equal(results.raw_results['Phi_omega'][2], 3.)
+
+        # Every sweep uses its own model, even if the workers cached a previous one
+        np.testing.assert_array_equal(self.run_engine([4000.]).modal_composites['a'], [4000., 4000.])
+
+    def test_sweep(self):
+        blocks = []
+        search_space = {'a': [1000., 2000.], 't_b': [2.], 'm': [1, 2]}
+        for block in self.engine.sweep(self.geometry, self.materials, search_space, callback=blocks.append):
+            self.assertEqual(block.modal_composites['a'], search_space['a'][len(blocks) - 1])
+
+        self.assertEqual(len(blocks), 2)
+
+    def test_no_strip_lengths(self):
+        results = self.run_engine([])
+
+        self.assertEqual(len(results.raw_results), 0)
+        self.assertEqual(len(results.modal_composites), 0)
+        self.assertIn('sigma_cr', results.raw_results.dtype.names)
+        self.assertIn('sigma_cr', results.modal_composites.dtype.names)
+
+    def test_abandoned_sweep(self):
+        pool = self.engine.pool
+        search_space = {'a': np.linspace(1000., 2000., 101), 't_b': [2.], 'm': [1, 2]}
+        sweep = self.engine.sweep(self.geometry, self.materials, search_space)
+        next(sweep)
+        sweep.close()
+
+        # The queued tasks of the abandoned sweep are dropped with the restarted pool
+        self.assertIsNot(self.engine.pool, pool)
+        np.testing.assert_array_equal(self.run_engine([1000.]).modal_composites['a'], [1000., 1000.])
+
+
+if __name__ == '__main__':
+    unittest.main()